@@ -10,16 +10,22 @@ async def validate_user_session(
 ) -> str:
     try:
         session_id = request.state.session_id
-        session_repo = UserSessionRepository(db)
-        session = await session_repo.get_by_id(session_id)
-
-        if not session:
-            session = await session_repo.create(session_id)
-
-        await session_repo.update_last_activity(session_id)
-
-        return session_id
     except AttributeError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="No session found"
         )
+
+    # Cached validation with batched last_activity writes
+    session_validator = getattr(request.app.state, "session_validator", None)
+    if session_validator is not None:
+        return await session_validator.validate(session_id, db)
+
+    session_repo = UserSessionRepository(db)
+    session = await session_repo.get_by_id(session_id)
+
+    if not session:
+        session = await session_repo.create(session_id)
+
+    await session_repo.update_last_activity(session_id)
+
+    return session_id
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
 from fastapi.params import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies.databas import get_async_db
 from app.db.redis import RedisRepository, get_redis
+from app.external.base_client import http_clients
 from app.schemas.healthcheck import HealthCheckResponse
 from app.services.health_checker import health_checker
 
@@ -39,6 +40,27 @@ async def health_check(
     }
 
 
+@router.get(
+    "/health/http-clients",
+    summary="Статистика пулов HTTP-соединений",
+)
+async def http_clients_stats():
+    """Запросы и соединения по каждому внешнему API"""
+    return http_clients.stats()
+
+
+@router.get(
+    "/health/package-cache",
+    summary="Статистика кэша посылок",
+)
+async def package_cache_stats(request: Request):
+    """Попадания и промахи кэша чтения посылок"""
+    package_cache = getattr(request.app.state, "package_cache", None)
+    if package_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **package_cache.stats()}
+
+
 @router.get(
     "/health/logs",
     summary="Проверка логов сервиса",
@@ -1,22 +1,57 @@
 from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
 from fastapi.params import Body, Path
+from fastapi.responses import StreamingResponse
 from pydantic import Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies.auth import validate_user_session
 from app.api.dependencies.databas import get_async_db
-from app.api.v1.schemas.package import PackageCreate, PackageOut, PackageUpdate
+from app.api.v1.schemas.package import (
+    ExportFormat,
+    PackageBulkCreate,
+    PackageBulkOut,
+    PackageCreate,
+    PackageOut,
+    PackagePage,
+    PackageUpdate,
+)
+from app.db.mysql import AsyncSessionLocal
 from app.db.repositories.package_repository import PackageRepository
+from app.services.package_export import MEDIA_TYPES, stream_packages
 from app.services.package_service import PackageService
 
 router = APIRouter()
 
+MAX_PAGE_LIMIT = 1000
+
+CurrencyQuery = Annotated[
+    str,
+    Query(
+        title="Currency",
+        description="ISO code of the currency to return delivery_cost in",
+        pattern="^[A-Za-z]{3}$",
+    ),
+]
 
-def get_package_service(db: AsyncSession = Depends(get_async_db)):
+
+def get_package_service(request: Request, db: AsyncSession = Depends(get_async_db)):
     package_repository = PackageRepository(session=db)
-    return PackageService(package_repository)
+    delivery_cost_queue = getattr(request.app.state, "delivery_cost_queue", None)
+    cbrf_service = getattr(request.app.state, "cbrf_service", None)
+    package_cache = getattr(request.app.state, "package_cache", None)
+    return PackageService(
+        package_repository, delivery_cost_queue, cbrf_service, package_cache
+    )
 
 
 @router.get(
@@ -38,6 +73,7 @@ async def get_packages(
             title="Limit",
             description="Maximum number of records to return",
             ge=1,
+            le=MAX_PAGE_LIMIT,
         ),
     ] = 100,
     skip: Annotated[
@@ -48,6 +84,7 @@ async def get_packages(
             ge=0,
         ),
     ] = 0,
+    currency: CurrencyQuery = "RUB",
 ) -> List[PackageOut]:
     """
     Retrieve a paginated list of packages for the authenticated user session.
@@ -58,6 +95,7 @@ async def get_packages(
     - **user_session**: A validated user session string used to identify the user.
     - **skip**: (Optional) The number of records to skip for pagination. Defaults to 0.
     - **limit**: (Optional) The maximum number of records to return. Defaults to 100.
+    - **currency**: (Optional) Currency of the returned delivery cost. Defaults to RUB.
 
     **Returns:**
     A list of packages conforming to the PackageOut schema.
@@ -66,8 +104,76 @@ async def get_packages(
     A GET request to `/packages?skip=10&limit=50` will return packages starting from
     the 11th record, up to 50 records.
     """
-    packages = await service.get_packages(user_session, skip=skip, limit=limit)
-    return packages
+    try:
+        return await service.get_packages(
+            user_session, skip=skip, limit=limit, currency=currency
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/packages/page",
+    response_model=PackagePage,
+    summary="Retrieve Packages (cursor pagination)",
+    description=(
+        "Retrieve packages for the authenticated user one page at a time. "
+        "Pass the 'next_cursor' from the previous response as 'cursor' to get "
+        "the following page; a missing 'next_cursor' means there are no more pages."
+    ),
+)
+async def get_packages_page(
+    service: PackageService = Depends(get_package_service),
+    user_session: str = Depends(validate_user_session),
+    cursor: Annotated[
+        str | None,
+        Query(
+            title="Cursor",
+            description="Opaque cursor returned as 'next_cursor' by the previous page",
+        ),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(
+            title="Limit",
+            description="Maximum number of records to return",
+            ge=1,
+            le=MAX_PAGE_LIMIT,
+        ),
+    ] = 100,
+    currency: CurrencyQuery = "RUB",
+) -> PackagePage:
+    try:
+        return await service.get_packages_page(
+            user_session, cursor=cursor, limit=limit, currency=currency
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/packages/export",
+    response_class=StreamingResponse,
+    summary="Export Packages",
+    description=(
+        "Stream every package of the authenticated user as NDJSON or CSV. "
+        "Rows are read with a server-side cursor and sent as they arrive."
+    ),
+)
+async def export_packages(
+    user_session: str = Depends(validate_user_session),
+    format: Annotated[
+        ExportFormat,
+        Query(title="Format", description="Output format: ndjson or csv"),
+    ] = ExportFormat.ndjson,
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_packages(AsyncSessionLocal, user_session, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="packages.{format.value}"'
+        },
+    )
 
 
 @router.get("/packages/{package_id}", response_model=PackageOut)
@@ -82,8 +188,12 @@ async def get_package(
     ],
     service: PackageService = Depends(get_package_service),
     user_session: str = Depends(validate_user_session),
+    currency: CurrencyQuery = "RUB",
 ):
-    package = await service.get_package_by_id(package_id, user_session)
+    try:
+        package = await service.get_package_by_id(package_id, user_session, currency)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not package:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,6 +240,25 @@ async def create_package(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post(
+    "/packages/bulk",
+    response_model=PackageBulkOut,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create Packages in Bulk",
+    description=(
+        "Create up to 1000 packages in one request. All packages are validated "
+        "first and then inserted with a single multi-row INSERT in one transaction."
+    ),
+)
+async def create_packages(
+    payload: PackageBulkCreate,
+    service: PackageService = Depends(get_package_service),
+    user_session: str = Depends(validate_user_session),
+) -> PackageBulkOut:
+    ids = await service.create_packages(payload.packages, user_session)
+    return PackageBulkOut(ids=ids)
+
+
 @router.put("/packages/{package_id}", response_model=PackageOut)
 async def update_package(
     package_id: Annotated[
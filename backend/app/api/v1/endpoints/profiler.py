@@ -0,0 +1,70 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import (
+    ProfilerBusyError,
+    SamplingProfiler,
+    is_profiler_allowed,
+    profiler,
+    profiler_enabled,
+)
+
+router = APIRouter()
+
+
+def require_profiler_access(request: Request) -> None:
+    if not profiler_enabled():
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if not is_profiler_allowed(request.headers):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def profile_report(sampler: SamplingProfiler) -> PlainTextResponse:
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Requests": str(sampler.requests),
+            "X-Profile-Duration": f"{sampler.duration:.4f}",
+        },
+    )
+
+
+@router.post(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Профилирование цикла событий",
+)
+async def profile(
+    request: Request,
+    seconds: float = Query(
+        5.0,
+        gt=0,
+        le=settings.PROFILER_MAX_SECONDS,
+        description="Длительность окна профилирования",
+    ),
+    requests: Optional[int] = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Профилировать следующие N запросов вместо окна",
+    ),
+):
+    """Семплирующий профайлер, отчёт в формате collapsed stacks для flame graph.
+
+    Доступен при DEBUG или с заголовком X-Admin-Token. Без ``requests``
+    профилирует всё, что выполняется за ``seconds``; с ``requests`` — следующие
+    N запросов, ожидая их не дольше ``seconds``.
+    """
+    require_profiler_access(request)
+    try:
+        if requests is None:
+            sampler = await profiler.profile_window(seconds)
+        else:
+            sampler = await profiler.profile_requests(requests, timeout=seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profile_report(sampler)
@@ -1,4 +1,5 @@
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, PositiveFloat
 
@@ -21,12 +22,41 @@ class PackageCreate(PackageBase):
     user_session: Optional[str] = None
 
 
+MAX_BULK_PACKAGES = 1000
+
+
+class PackageBulkCreate(BaseModel):
+    packages: List[PackageBase] = Field(..., min_length=1, max_length=MAX_BULK_PACKAGES)
+
+
+class PackageBulkOut(BaseModel):
+    ids: List[int]
+
+
 class PackageUpdate(PackageBase):
     delivery_cost: Optional[PositiveFloat] = None
 
 
 class PackageOut(BaseModel):
     id: int
+    # Nullable columns; rows written outside the API may lack them
+    name: Optional[str] = None
+    weight: Optional[float] = None
+    type_id: Optional[int] = None
+    content_cost: Optional[float] = None
+    delivery_cost: Optional[float] = None
+    # Currency of delivery_cost
+    currency: str = "RUB"
     # type: PackageType
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PackagePage(BaseModel):
+    items: List[PackageOut]
+    next_cursor: Optional[str] = None
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import HttpUrl
 from pydantic_settings import BaseSettings
 
@@ -33,6 +35,9 @@ class RedisSettings(BaseSettings):
     REDIS_POOL_SIZE: int = 10
     REDIS_RETRY_ON_TIMEOUT: bool = True
     CACHE_TTL: int = 300  # 5 minutes
+    PACKAGE_CACHE_ENABLED: bool = True
+    REDIS_CODEC: str = "json"  # json, orjson, msgpack
+    REDIS_COMPRESS_THRESHOLD: int = 1024  # bytes, 0 disables compression
 
     @property
     def REDIS_URL(self) -> str:
@@ -44,10 +49,34 @@ class RedisSettings(BaseSettings):
 class CBRFSettings(BaseSettings):
     EXTERNAL_API_TIMEOUT: int = 10
     EXTERNAL_API_MAX_RETRIES: int = 2
+    EXTERNAL_API_MAX_CONNECTIONS: int = 100
+    EXTERNAL_API_MAX_KEEPALIVE: int = 20
+    EXTERNAL_API_KEEPALIVE_EXPIRY: float = 30.0
+    EXTERNAL_API_HTTP2: bool = False
+    EXTERNAL_API_BACKOFF_BASE: float = 0.2  # seconds
+    EXTERNAL_API_BACKOFF_MAX: float = 5.0  # seconds
+    EXTERNAL_API_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    EXTERNAL_API_CIRCUIT_RECOVERY_TIMEOUT: float = 30.0  # seconds
     USER_AGENT: str = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/51.0.2704.103 Safari/537.36"
     CBR_API_URL: HttpUrl = HttpUrl("https://www.cbr-xml-daily.ru/")
-    REDIS_DATA_KEY: str = "cbrf:daily_rates:data"
-    REDIS_USD_KEY: str = "cbrf:daily_rates:usd"
+    REDIS_DATA_KEY: str = "cbrf:rate_table:data"
+    CBR_RATES_CACHE_TTL: int = 3600  # Redis, 1 hour
+    CBR_RATES_MEMORY_TTL: int = 300  # in-process, 5 minutes
+    CBR_RATES_PREFETCH_MARGIN: float = 30.0  # refresh this long before expiry
+    CBR_RATES_PUBLICATION_GRACE: float = 300.0  # wait after expected publication
+    CBR_RATES_REFRESH_RETRY: float = 60.0  # retry delay after a failed refresh
+
+
+class SchedulerSettings(BaseSettings):
+    DELIVERY_COST_INTERVAL: int = 300  # 5 minutes
+    DELIVERY_COST_SET_BASED: bool = True
+    DELIVERY_COST_CHUNK_SIZE: int = 5000
+    # With the queue enabled the periodic sweep is only a safety net
+    DELIVERY_COST_QUEUE_ENABLED: bool = True
+    DELIVERY_COST_SWEEP_INTERVAL: int = 1800  # 30 minutes
+    DELIVERY_COST_QUEUE_WORKERS: int = 2
+    DELIVERY_COST_QUEUE_BATCH_SIZE: int = 500
+    DELIVERY_COST_QUEUE_BATCH_WINDOW: float = 0.01  # seconds
 
 
 class SesssionSetting(BaseSettings):
@@ -55,11 +84,42 @@ class SesssionSetting(BaseSettings):
     SESSION_LIFETIME: int = 7 * 24 * 3600  # 7 дней
     SESSION_COOKIE_SECURE: bool = True
     SESSION_AUTO_CLEANUP: bool = True
+    SESSION_CACHE_TTL: int = 3600  # known session ids in Redis, 1 hour
+    SESSION_MEMORY_TTL: int = 60  # in-process LRU
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_ACTIVITY_FLUSH_INTERVAL: float = 5.0  # seconds
+    SESSION_CLEANUP_INTERVAL: int = 3600  # 1 hour
+    SESSION_CLEANUP_BATCH_SIZE: int = 500
+    SESSION_CLEANUP_BATCH_PAUSE: float = 0.1  # seconds between batches
 
 
-class Settings(DatabaseSettings, RedisSettings, CBRFSettings, BaseSettings):
+class Settings(
+    DatabaseSettings,
+    RedisSettings,
+    CBRFSettings,
+    SchedulerSettings,
+    SesssionSetting,
+    BaseSettings,
+):
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"  # DEBUG, WARNING, ERROR
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    # Share of successful INFO access log lines to keep, 1.0 keeps all
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+    # Tracebacks of identical server errors logged per window
+    ERROR_LOG_BURST: int = 1
+    ERROR_LOG_WINDOW: float = 60.0  # seconds
+    # Profiler endpoints are off unless DEBUG is set or this token is sent
+    # in the X-Admin-Token header
+    PROFILER_ADMIN_TOKEN: Optional[str] = None
+    PROFILER_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILER_MAX_SECONDS: float = 60.0
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "jsonl"  # memory
+    TRACING_FILE: str = "traces.jsonl"  # relative to the logs directory
+    TRACING_SERVICE_NAME: str = "delivery-service"  # OTLP service.name
+    # Share of traces recorded, decided when the root span starts
+    TRACING_SAMPLE_RATE: float = 1.0
     ENVIRONMENT: str = "development"  #  production
 
 
@@ -0,0 +1,3 @@
+# Delivery cost in USD: weight * WEIGHT_RATE + content_cost * CONTENT_COST_RATE
+WEIGHT_RATE = 0.5
+CONTENT_COST_RATE = 0.01
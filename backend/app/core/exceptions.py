@@ -20,3 +20,10 @@ class RedisError(AppException):
 class ExternalAPIClientError(AppException):
     status_code = 503
     detail = "Max retries exceeded"
+
+
+class CircuitOpenError(ExternalAPIClientError):
+    """Raised without a request while the upstream's circuit is open"""
+
+    status_code = 503
+    detail = "External service temporarily unavailable"
@@ -1,8 +1,16 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+from app.core.config import settings
+
 # Ensure the logs directory exists relative to the project root
 LOG_DIR = Path(__file__).parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
@@ -12,6 +20,11 @@ logger = logging.getLogger("app")
 logger.setLevel(logging.DEBUG)
 logger.propagate = False  # Prevent propagation to uvicorn's default loggers
 
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName"}
+
 
 # Formatter for console: no traceback details
 class NoTracebackFormatter(logging.Formatter):
@@ -19,6 +32,36 @@ class NoTracebackFormatter(logging.Formatter):
         return ""
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the fields passed in ``extra``.
+
+    Access log lines carry request_id, method, route, status, duration and
+    the DB timing of the request.
+    """
+
+    def __init__(self, include_traceback: bool = True):
+        super().__init__()
+        self.include_traceback = include_traceback
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and self.include_traceback:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info and self.include_traceback:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
 # Filter to drop log records from uvicorn.error so that they don't duplicate in console
 class UvicornErrorFilter(logging.Filter):
     def filter(self, record):
@@ -26,19 +69,60 @@ class UvicornErrorFilter(logging.Filter):
         return not record.name.startswith("uvicorn.error")
 
 
+class AccessLogSampler(logging.Filter):
+    """Keeps a share of successful INFO access log lines.
+
+    Only records logged with ``extra={"access_log": True}`` are sampled;
+    warnings, errors and responses with status >= 400 are always kept.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1.0 or not getattr(record, "access_log", False):
+            return True
+        if record.levelno > logging.INFO or getattr(record, "status", 0) >= 400:
+            return True
+        return random.random() < self.rate
+
+
+class LogQueueHandler(QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    The stock ``prepare`` renders the message with the traceback and drops
+    ``exc_info``, which would leak tracebacks to the console and hide the
+    exception from structured formatters. Here only the message arguments
+    are merged, so mutable arguments cannot change before the record is
+    written; the record stays in process, so ``exc_info`` can be kept.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+if settings.LOG_FORMAT == "json":
+    console_formatter = JsonFormatter(include_traceback=False)
+    file_formatter = JsonFormatter()
+else:
+    console_formatter = NoTracebackFormatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    file_formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
 # Console handler: DEBUG and above, without traceback details and filtered uvicorn errors
-console_formatter = NoTracebackFormatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.DEBUG)
 console_handler.setFormatter(console_formatter)
 console_handler.addFilter(UvicornErrorFilter())
 
 # File handler: INFO and above, with full traceback details
-file_formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 file_handler = RotatingFileHandler(
     filename=str(LOG_DIR / "app.log"),
     maxBytes=10 * 1024 * 1024,  # 10 MB
@@ -47,6 +131,17 @@ file_handler = RotatingFileHandler(
 file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(file_formatter)
 
-# Attach handlers to our base logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# The event loop only enqueues records; formatting, writes and rotation
+# happen on the listener thread
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = LogQueueHandler(log_queue)
+queue_handler.addFilter(AccessLogSampler(settings.LOG_ACCESS_SAMPLE_RATE))
+log_listener = QueueListener(
+    log_queue, console_handler, file_handler, respect_handler_level=True
+)
+
+# Attach the queue handler to our base logger
+logger.addHandler(queue_handler)
+log_listener.start()
+# Write what is still queued when the process exits
+atexit.register(log_listener.stop)
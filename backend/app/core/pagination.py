@@ -0,0 +1,35 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor wraps the last seen primary key so clients can request the next page
+without the server having to skip over every previous row.
+"""
+
+import base64
+
+_CURSOR_PREFIX = "id:"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Build an opaque cursor pointing past ``last_id``."""
+    raw = f"{_CURSOR_PREFIX}{last_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the id encoded in ``cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not raw.startswith(_CURSOR_PREFIX):
+        raise ValueError("Invalid cursor")
+    try:
+        return int(raw[len(_CURSOR_PREFIX) :])
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,208 @@
+"""Sampling profiler for the event loop thread.
+
+A background thread reads the loop thread's stack from
+``sys._current_frames()`` every ``PROFILER_INTERVAL`` seconds and counts
+identical stacks. The report is in the collapsed-stack format understood by
+flamegraph.pl, speedscope and similar tools: one ``frame;frame;frame count``
+line per distinct stack, outermost frame first.
+
+Sampling costs the loop nothing between samples, so it is safe to run
+against live traffic for a short window. All requests share the loop
+thread, so a sample may land in a concurrent request that is not profiled.
+"""
+
+import asyncio
+import contextlib
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterator, Mapping, Optional
+
+from app.core.config import settings
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+def profiler_enabled() -> bool:
+    return settings.DEBUG or bool(settings.PROFILER_ADMIN_TOKEN)
+
+
+def is_profiler_allowed(headers: Mapping[str, str]) -> bool:
+    """DEBUG allows everyone, otherwise the admin token must match."""
+    if settings.DEBUG:
+        return True
+    token = settings.PROFILER_ADMIN_TOKEN
+    if not token:
+        return False
+    return secrets.compare_digest(headers.get(ADMIN_TOKEN_HEADER, ""), token)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """The stack ending in ``frame`` as ``outer;...;inner``."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Counts the stacks of one thread, sampled from a background thread.
+
+    With ``gated=True`` samples are only taken while at least one
+    ``enter``/``exit`` block is active, e.g. while a profiled request runs.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.PROFILER_INTERVAL,
+        thread_id: Optional[int] = None,
+        gated: bool = False,
+    ):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.gated = gated
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.requests = 0
+        self.duration = 0.0
+        self._active = 0
+        self._started_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def enter(self) -> None:
+        self._active += 1
+
+    def exit(self) -> None:
+        self._active -= 1
+        self.requests += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self.duration = time.perf_counter() - self._started_at
+        return self
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            if self.gated and self._active <= 0:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[collapse_stack(frame)] += 1
+            self.samples += 1
+            del frame
+
+    def collapsed(self) -> str:
+        """The report, most frequent stacks first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class Profiler:
+    """Runs one on-demand profile at a time.
+
+    A profile covers either a time window, the next ``count`` requests,
+    which ProfilerMiddleware claims through ``claim_request``, or a single
+    ``?profile=1`` request.
+    """
+
+    def __init__(self, interval: float = settings.PROFILER_INTERVAL):
+        self.interval = interval
+        self._current: Optional[SamplingProfiler] = None
+        self._remaining = 0
+        self._done: Optional[asyncio.Event] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None
+
+    def _begin(self, gated: bool) -> SamplingProfiler:
+        if self.busy:
+            raise ProfilerBusyError("A profile is already running")
+        self._current = SamplingProfiler(self.interval, gated=gated).start()
+        return self._current
+
+    def _end(self) -> None:
+        self._current.stop()
+        self._current = None
+        self._remaining = 0
+        self._done = None
+
+    async def profile_window(self, seconds: float) -> SamplingProfiler:
+        """Sample everything the loop does for ``seconds``."""
+        sampler = self._begin(gated=False)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._end()
+        return sampler
+
+    async def profile_requests(self, count: int, timeout: float) -> SamplingProfiler:
+        """Sample the next ``count`` requests, waiting at most ``timeout``."""
+        sampler = self._begin(gated=True)
+        self._remaining = count
+        self._done = done = asyncio.Event()
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._end()
+        return sampler
+
+    @contextlib.contextmanager
+    def profile_request(self) -> Iterator[SamplingProfiler]:
+        """Sample the request running inside the block."""
+        sampler = self._begin(gated=True)
+        sampler.enter()
+        try:
+            yield sampler
+        finally:
+            sampler.exit()
+            self._end()
+
+    def claim_request(self) -> Optional[SamplingProfiler]:
+        """The running request profile, if it still wants requests."""
+        sampler = self._current
+        if sampler is None or not sampler.gated or self._remaining <= 0:
+            return None
+        self._remaining -= 1
+        return sampler
+
+    def finish_request(self, sampler: SamplingProfiler) -> None:
+        sampler.exit()
+        if sampler is self._current and self._remaining <= 0 and not sampler.active:
+            self._done.set()
+
+
+profiler = Profiler()
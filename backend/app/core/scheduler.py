@@ -6,9 +6,17 @@ from fastapi import FastAPI
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.core.logger import logger
+from app.core.metrics import (
+    DELIVERY_COST_BACKLOG,
+    DELIVERY_COST_BATCH_DURATION,
+    DELIVERY_COST_PRICED,
+)
+from app.core.tracing import traced
 from app.db.repositories.package_repository import PackageRepository
 from app.external.CBRF_client import CBRFClient
+from app.services.cbrf import CBRFService
 from app.services.delivery_cost_calculator import DeliveryCostCalculator
+from app.services.package_cache import PackageCache
 
 
 class DeliveryCostScheduler:
@@ -16,37 +24,144 @@ class DeliveryCostScheduler:
         self,
         async_session_maker: async_sessionmaker[AsyncSession],
         interval_seconds: int = 300,  # 5 minutes
+        set_based: bool = True,
+        chunk_size: int = 5000,
+        cbrf_service: Optional[CBRFService] = None,
+        package_cache: Optional[PackageCache] = None,
     ):
         self.async_session_maker = async_session_maker
         self.interval_seconds = interval_seconds
+        self.set_based = set_based
+        self.chunk_size = chunk_size
+        self.cbrf_service = cbrf_service
+        self.package_cache = package_cache
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
 
+    @traced()
     async def process_delivery_costs(self) -> None:
         """Process delivery costs for unprocessed packages."""
+        with DELIVERY_COST_BATCH_DURATION.time():
+            if self.set_based:
+                await self.process_delivery_costs_set_based()
+            else:
+                await self.process_delivery_costs_orm()
+
+    async def process_delivery_costs_orm(self) -> int:
+        """Load unprocessed packages in chunks and price them one by one.
+
+        The USD rate is fetched before any row is locked, and every chunk is
+        committed before the next one is claimed, so user updates wait for
+        at most one chunk.
+
+        Returns:
+            int: Number of packages priced
+        """
+        processed = 0
         async with self.async_session_maker() as session:
             try:
-                # Get unprocessed packages
                 package_repository = PackageRepository(session)
-                packages = await package_repository.get_unprocessed_packages()
+                backlog = await package_repository.count_unprocessed_packages()
+                DELIVERY_COST_BACKLOG.set(backlog)
+                if not backlog:
+                    logger.info("No unprocessed packages found")
+                    return 0
+                # Close the read transaction before the HTTP call
+                await session.commit()
+
+                usd_rate = await self._get_usd_rate()
+
+                last_id = 0
+                while True:
+                    packages = await package_repository.get_unprocessed_packages(
+                        self.chunk_size, after_id=last_id
+                    )
+                    if not packages:
+                        break
+                    last_id = packages[-1].id
+
+                    delivery_costs = DeliveryCostCalculator.compute_delivery_costs(
+                        [package.weight for package in packages],
+                        [package.content_cost for package in packages],
+                        usd_rate,
+                    )
+                    for package, delivery_cost in zip(packages, delivery_costs):
+                        package.delivery_cost = delivery_cost
+
+                    # Commits the chunk and releases its locks
+                    await package_repository.bulk_update_delivery_costs(packages)
+                    processed += len(packages)
+                    if self.package_cache is not None:
+                        await self.package_cache.invalidate_many(
+                            (package.id, package.user_session) for package in packages
+                        )
+                    DELIVERY_COST_BACKLOG.set(max(backlog - processed, 0))
+
+                logger.info(f"Successfully processed {processed} packages")
+
+            except Exception as e:
+                logger.error(f"Error in delivery cost processing: {str(e)}")
+
+        DELIVERY_COST_PRICED.inc(amount=processed)
+        return processed
+
+    async def _get_usd_rate(self) -> float:
+        if self.cbrf_service is not None:
+            return await self.cbrf_service.get_usd_rate()
+        async with CBRFClient() as cbrf_client:
+            rates = await cbrf_client.get_daily_rates()
+        return rates["Valute"]
+
+    async def process_delivery_costs_set_based(self) -> int:
+        """Price unprocessed packages with chunked UPDATE statements.
 
-                if not packages:
+        The USD rate is fetched once per run and the cost is computed by the
+        database, so no package rows are loaded into the process. Chunks are
+        claimed with SELECT ... FOR UPDATE SKIP LOCKED, so schedulers running
+        in several workers or replicas split the backlog instead of
+        repeating each other's work.
+
+        Returns:
+            int: Number of packages priced
+        """
+        processed = 0
+        async with self.async_session_maker() as session:
+            try:
+                package_repository = PackageRepository(session)
+                backlog = await package_repository.count_unprocessed_packages()
+                DELIVERY_COST_BACKLOG.set(backlog)
+                if not backlog:
                     logger.info("No unprocessed packages found")
-                    return
+                    return 0
+                # Close the read transaction before the HTTP call
+                await session.commit()
 
-                # Calculate delivery costs
-                async with CBRFClient() as cbrf_client:
-                    calculator = DeliveryCostCalculator(cbrf_client)
-                    await calculator.process_unprocessed_packages(packages)
+                usd_rate = await self._get_usd_rate()
 
-                # Update packages in database
-                await package_repository.bulk_update_delivery_costs(packages)
+                # Key-set on the id, so rows left unpriced are not claimed again
+                last_id = 0
+                while True:
+                    claimed = await package_repository.claim_unprocessed(
+                        self.chunk_size, after_id=last_id
+                    )
+                    if not claimed:
+                        break
+                    last_id = claimed[-1][0]
+                    processed += await package_repository.price_packages(
+                        [package_id for package_id, _ in claimed], usd_rate
+                    )
+                    if self.package_cache is not None:
+                        await self.package_cache.invalidate_many(claimed)
+                    DELIVERY_COST_BACKLOG.set(max(backlog - processed, 0))
 
-                logger.info(f"Successfully processed {len(packages)} packages")
+                logger.info(f"Successfully processed {processed} packages")
 
             except Exception as e:
                 logger.error(f"Error in delivery cost processing: {str(e)}")
 
+        DELIVERY_COST_PRICED.inc(amount=processed)
+        return processed
+
     async def start(self) -> None:
         """Start the scheduler."""
         if self.is_running:
@@ -0,0 +1,369 @@
+"""In-process tracing spans.
+
+``tracer.span(name)`` opens a span as a child of the span current in the
+context, so spans follow a request from the middleware through services,
+repositories, Redis and outgoing HTTP calls, including into tasks created
+while the span is open. When a root span ends, its finished spans are handed
+to the exporter as one batch.
+
+With tracing disabled ``span`` returns a shared no-op context manager, so
+instrumented code pays for one attribute check. Each line of the JSON lines
+file is one batch as an OTLP/JSON ``ExportTraceServiceRequest``, so a line
+can be POSTed as is to a collector's ``/v1/traces`` endpoint.
+"""
+
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence
+
+from app.core.config import settings
+from app.core.logger import LOG_DIR, logger
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+        "error",
+        "_trace",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        tracer: "Tracer",
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        if parent is None:
+            self.trace_id = os.urandom(16).hex()
+            self.parent_id = None
+            self._trace = _Trace(tracer)
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._trace = parent._trace
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+            self._trace.tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The span in OTLP/JSON field names."""
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2 if self.status == "error" else 1},
+        }
+        if self.error:
+            data["status"]["message"] = self.error
+        return data
+
+
+def otlp_request(spans: Sequence[Span], service_name: str) -> Dict[str, Any]:
+    """Spans wrapped in an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": _otlp_value(service_name)}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_dict() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace is not sampled."""
+
+    name = ""
+    trace_id = None
+    span_id = None
+    parent_id = None
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("tracer", "spans", "exported")
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.spans: List[Span] = []
+        self.exported = False
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The span open in this context, NOOP_SPAN if there is none."""
+    return _current_span.get() or NOOP_SPAN
+
+
+class _SpanContext:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span):
+        self.span = span
+        self.token: Optional[Token] = None
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self.token)
+        if exc is not None:
+            self.span.set_error(exc)
+        self.span.end()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: Sequence[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests and debugging."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self.spans.extend(spans)
+
+    def shutdown(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def names(self) -> List[str]:
+        return [span.name for span in self.spans]
+
+
+class JsonLinesExporter:
+    """Appends each batch of spans as an OTLP/JSON export request line.
+
+    Writes happen on a single background thread, so exporting never blocks
+    the event loop on disk I/O.
+    """
+
+    def __init__(self, path: Path, service_name: str = settings.TRACING_SERVICE_NAME):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="traces")
+
+    def export(self, spans: Sequence[Span]) -> None:
+        line = json.dumps(otlp_request(spans, self.service_name)) + "\n"
+        self._executor.submit(self._write, line)
+
+    def _write(self, line: str) -> None:
+        try:
+            with self.path.open("a", encoding="utf-8") as file:
+                file.write(line)
+        except OSError as e:
+            logger.error(f"Error writing traces: {e}")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.exporter: Optional[SpanExporter] = None
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        exporter: Optional[SpanExporter],
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.enabled = enabled and exporter is not None
+
+    def shutdown(self) -> None:
+        self.enabled = False
+        if self.exporter is not None:
+            self.exporter.shutdown()
+            self.exporter = None
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager opening a child of the current span."""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            # Inside a trace that was not sampled
+            return NOOP_SPAN
+        if parent is None and random.random() >= self.sample_rate:
+            return _SpanContext(NOOP_SPAN)
+        return _SpanContext(Span(name, self, parent, attributes))
+
+    def start_span(self, name: str, **attributes: Any):
+        """Start a child of the current span without making it current.
+
+        For callbacks that cannot wrap the work in ``with``; the caller
+        must call ``end()``.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None or parent is NOOP_SPAN:
+            # Only recorded as part of a trace
+            return NOOP_SPAN
+        return Span(name, self, parent, attributes)
+
+    def _finish(self, span: Span) -> None:
+        trace = span._trace
+        with self._lock:
+            if span.parent_id is None:
+                batch = trace.spans + [span]
+                trace.spans = []
+                trace.exported = True
+            elif trace.exported:
+                # Outlived its root, e.g. in a background task
+                batch = [span]
+            else:
+                trace.spans.append(span)
+                return
+        if self.exporter is not None:
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.error(f"Error exporting spans: {e}")
+
+
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running a function, sync or async, inside a span.
+
+    The span is named after the function's qualified name unless ``name``
+    is given.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_tracing() -> None:
+    """Set up the global tracer from settings."""
+    exporter: Optional[SpanExporter] = None
+    if settings.TRACING_EXPORTER == "jsonl":
+        exporter = JsonLinesExporter(LOG_DIR / settings.TRACING_FILE)
+    elif settings.TRACING_EXPORTER == "memory":
+        exporter = InMemoryExporter()
+    tracer.configure(exporter, settings.TRACING_ENABLED, settings.TRACING_SAMPLE_RATE)
@@ -0,0 +1,125 @@
+import json
+import zlib
+from typing import Any, Dict, Protocol
+
+from pydantic import BaseModel
+
+from app.core.logger import logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class Codec(Protocol):
+    name: str
+
+    def encode(self, value: Any) -> bytes: ...
+
+    def decode(self, data: bytes) -> Any: ...
+
+
+def to_builtin(value: Any) -> Any:
+    """Fallback for values the serializers do not know.
+
+    Pydantic models are dumped in JSON mode, other objects such as
+    RateTable are expected to provide ``to_dict``.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), default=to_builtin).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=to_builtin)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=to_builtin)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+class CompressedCodec:
+    """Wraps a codec and zlib-compresses payloads above ``threshold`` bytes.
+
+    Every payload starts with a one byte header telling whether the rest is
+    compressed, so small values pay no compression cost. Data without a
+    known header was not written by this codec and is rejected.
+    """
+
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+
+    def __init__(self, codec: Codec, threshold: int = 1024, level: int = 1):
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self.name = f"{codec.name}+zlib"
+
+    def encode(self, value: Any) -> bytes:
+        data = self.codec.encode(value)
+        if len(data) < self.threshold:
+            return self.RAW + data
+        return self.ZLIB + zlib.compress(data, self.level)
+
+    def decode(self, data: bytes) -> Any:
+        header, payload = data[:1], data[1:]
+        if header == self.ZLIB:
+            payload = zlib.decompress(payload)
+        elif header != self.RAW:
+            raise ValueError(f"Unknown {self.name} header {header!r}")
+        return self.codec.decode(payload)
+
+
+CODECS: Dict[str, type] = {"json": JsonCodec}
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec
+
+
+def get_codec(name: str = "json", compress_threshold: int = 0) -> Codec:
+    """Build a codec by name, falling back to JSON if it is not installed.
+
+    Args:
+        name: json, orjson or msgpack
+        compress_threshold: Compress payloads of at least this many bytes,
+            0 disables compression
+    """
+    codec_cls = CODECS.get(name)
+    if codec_cls is None:
+        logger.warning(f"Redis codec {name!r} is not available, using json")
+        codec_cls = JsonCodec
+    codec = codec_cls()
+    if compress_threshold > 0:
+        return CompressedCodec(codec, compress_threshold)
+    return codec
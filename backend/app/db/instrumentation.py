@@ -0,0 +1,106 @@
+"""Per-request SQL query accounting.
+
+``instrument_engine`` hooks SQLAlchemy cursor events on an engine. While a
+``track_queries`` block is active (LoggingMiddleware opens one per request),
+every statement executed in that context adds to its QueryStats. The
+statistics travel in a contextvar, so they follow the request through
+dependencies, services and the async driver's greenlets. With tracing
+enabled every statement is also recorded as a ``db.query`` span.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.tracing import tracer
+
+# ExecutionContext attributes holding the statement start time and span
+_START_TIME_ATTR = "_query_start_time"
+_SPAN_ATTR = "_query_span"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0  # seconds
+    record_statements: bool = False
+    statements: List[str] = field(default_factory=list)
+    # Enclosing block, which counts the same queries
+    parent: Optional["QueryStats"] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def server_timing(self) -> str:
+        """Value for the ``Server-Timing`` response header."""
+        return f'db;dur={self.duration_ms:.2f};desc="{self.count} queries"'
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+@contextmanager
+def track_queries(record_statements: bool = False) -> Iterator[QueryStats]:
+    """Count queries executed in the current context until the block exits.
+
+    Blocks nest: queries count towards every enclosing block as well, so a
+    test can budget a request that the middleware is also tracking.
+    """
+    stats = QueryStats(record_statements=record_statements, parent=_query_stats.get())
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _START_TIME_ATTR, time.perf_counter())
+        if tracer.enabled:
+            setattr(
+                context, _SPAN_ATTR, tracer.start_span("db.query", statement=statement)
+            )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, _SPAN_ATTR, None)
+    if span is not None:
+        span.end()
+    stats = _query_stats.get()
+    start_time = getattr(context, _START_TIME_ATTR, None)
+    duration = time.perf_counter() - start_time if start_time is not None else 0.0
+    while stats is not None:
+        stats.count += 1
+        stats.duration += duration
+        if stats.record_statements:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, _SPAN_ATTR, None)
+    if span is not None:
+        span.set_error(exception_context.original_exception)
+        span.end()
+
+
+def instrument_engine(engine: Union[AsyncEngine, Engine]) -> None:
+    """Attach query accounting to an engine; safe to call more than once."""
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -6,6 +6,13 @@ from app.db.base import Base
 
 class Package(Base):
     __tablename__ = "packages"
+    __table_args__ = (
+        # Keyset pagination: WHERE user_session = ? AND id > ? ORDER BY id
+        Index("ix_packages_user_session_id", "user_session", "id"),
+        # Backlog count and claims: WHERE delivery_cost IS NULL AND id > ?
+        Index("ix_packages_delivery_cost_id", "delivery_cost", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255))
     weight = Column(Float())
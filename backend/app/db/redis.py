@@ -1,51 +1,217 @@
-from typing import AsyncGenerator, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
 import redis.asyncio as redis
+from fastapi import Request
+from redis.asyncio.client import Pipeline
 from redis.exceptions import ConnectionError
 
 from app.core.config import settings  # Assumes settings.REDIS_URL is defined
 from app.core.exceptions import RedisError
+from app.core.metrics import REDIS_COMMAND_DURATION
+from app.core.tracing import tracer
+from app.db.codecs import Codec, get_codec
+
+# Write only while the guard key still holds the value read before loading
+_SET_IF_GUARD = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[3] then return 0 end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+_HSET_IF_GUARD = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[4] then return 0 end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+@contextmanager
+def _observe_command(command: str) -> Iterator[None]:
+    """Time a Redis command in the metrics and, if tracing, in a span."""
+    with tracer.span(f"redis.{command}"), REDIS_COMMAND_DURATION.time(command):
+        yield
 
 
 class RedisRepository:
     """
     An asynchronous repository for Redis using redis.asyncio.
     Provides basic CRUD operations: get, set, and delete.
+
+    One instance is created per application and shared by every request; its
+    connection pool holds at most ``max_connections`` connections and callers
+    wait for a free one instead of opening more.
+
+    Responses are raw bytes: ``get``/``set`` work with strings, while
+    ``get_value``/``set_value`` store any value through ``codec``. Keys of
+    such values should go through ``value_key`` so that changing the codec
+    never reads entries written by another one.
     """
 
-    def __init__(self, redis_url: str):
-        self._client = redis.from_url(
-            settings.REDIS_URL, encoding="utf-8", decode_responses=True
+    def __init__(
+        self,
+        redis_url: str = settings.REDIS_URL,
+        max_connections: int = settings.REDIS_POOL_SIZE,
+        codec: Optional[Codec] = None,
+    ):
+        self._pool = redis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections,
+            timeout=settings.REDIS_TIMEOUT,
+            retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+            decode_responses=False,
         )
+        self._client = redis.Redis(connection_pool=self._pool)
+        self.codec = codec or get_codec(
+            settings.REDIS_CODEC, settings.REDIS_COMPRESS_THRESHOLD
+        )
+        self._set_if_guard = self._client.register_script(_SET_IF_GUARD)
+        self._hset_if_guard = self._client.register_script(_HSET_IF_GUARD)
 
     async def check_connect(self):
         try:
-            await self._client.ping()
+            with _observe_command("ping"):
+                await self._client.ping()
         except ConnectionError as e:
             raise RedisError(f"Failed to connect to Redis: {e}")
 
     async def get(self, key: str) -> Optional[str]:
-        return await self._client.get(key)
+        with _observe_command("get"):
+            value = await self._client.get(key)
+        return value.decode() if value is not None else None
 
     async def set(self, key: str, value: str, expire: int | None = None) -> bool:
         if expire is None:
             expire = settings.REDIS_TIMEOUT
-        return await self._client.set(key, value, ex=expire)
+        with _observe_command("set"):
+            return await self._client.set(key, value, ex=expire)
+
+    async def delete(self, *keys: str) -> int:
+        with _observe_command("delete"):
+            return await self._client.delete(*keys)
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        with _observe_command("hget"):
+            value = await self._client.hget(key, field)
+        return value.decode() if value is not None else None
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[str]]:
+        """Get several keys in one round trip"""
+        if not keys:
+            return []
+        with _observe_command("mget"):
+            values = await self._client.mget(keys)
+        return [value.decode() if value is not None else None for value in values]
+
+    def value_key(self, key: str) -> str:
+        """Namespace ``key`` by the codec, e.g. ``rates`` -> ``rates:json+zlib``"""
+        return f"{key}:{self.codec.name}"
+
+    async def get_value(self, key: str) -> Any:
+        """Get a value stored with ``set_value``, None if missing"""
+        with _observe_command("get"):
+            data = await self._client.get(key)
+        return self.codec.decode(data) if data is not None else None
+
+    async def set_value(self, key: str, value: Any, expire: int | None = None) -> bool:
+        if expire is None:
+            expire = settings.REDIS_TIMEOUT
+        data = self.codec.encode(value)
+        with _observe_command("set"):
+            return await self._client.set(key, data, ex=expire)
+
+    async def set_value_if(
+        self,
+        key: str,
+        value: Any,
+        guard_key: str,
+        guard: Optional[str],
+        expire: int | None = None,
+    ) -> bool:
+        """``set_value`` only if ``guard_key`` still holds ``guard``
+
+        The check and the write are one atomic script; ``guard`` None means
+        the guard key must be missing. Returns whether the value was written.
+        """
+        if expire is None:
+            expire = settings.REDIS_TIMEOUT
+        data = self.codec.encode(value)
+        with _observe_command("set_if"):
+            written = await self._set_if_guard(
+                keys=[key, guard_key], args=[data, expire, guard or ""]
+            )
+        return bool(written)
+
+    async def hset_value_if(
+        self,
+        key: str,
+        field: str,
+        value: Any,
+        guard_key: str,
+        guard: Optional[str],
+        expire: int | None = None,
+    ) -> bool:
+        """Set a hash field and the hash TTL only if ``guard_key`` holds ``guard``"""
+        if expire is None:
+            expire = settings.REDIS_TIMEOUT
+        data = self.codec.encode(value)
+        with _observe_command("hset_if"):
+            written = await self._hset_if_guard(
+                keys=[key, guard_key], args=[field, data, expire, guard or ""]
+            )
+        return bool(written)
+
+    async def hget_value(self, key: str, field: str) -> Any:
+        with _observe_command("hget"):
+            data = await self._client.hget(key, field)
+        return self.codec.decode(data) if data is not None else None
+
+    async def mget_values(self, keys: Sequence[str]) -> List[Any]:
+        """Get several values stored with ``set_value`` in one round trip"""
+        if not keys:
+            return []
+        with _observe_command("mget"):
+            values = await self._client.mget(keys)
+        return [
+            self.codec.decode(data) if data is not None else None for data in values
+        ]
+
+    async def mset(self, mapping: Dict[str, str], expire: int | None = None) -> bool:
+        """Set several keys with the same TTL in one round trip"""
+        if not mapping:
+            return True
+        if expire is None:
+            expire = settings.REDIS_TIMEOUT
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=expire)
+            with _observe_command("pipeline"):
+                results = await pipe.execute()
+        return all(results)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        """Batch commands into one round trip
+
+        Commands are sent as given; encode values with ``codec`` and expect
+        bytes in the results.
 
-    async def delete(self, key: str) -> int:
-        return await self._client.delete(key)
+        Usage:
+            async with redis.pipeline() as pipe:
+                pipe.get("a")
+                pipe.incr("b")
+                a, b = await pipe.execute()
+        """
+        return self._client.pipeline(transaction=transaction)
 
     async def close(self):
-        await self._client.close()
+        await self._client.aclose()
+        await self._pool.disconnect()
 
 
-async def get_redis() -> AsyncGenerator[RedisRepository, None]:
+def get_redis(request: Request) -> RedisRepository:
     """
     FastAPI dependency
-    TODO Здесь нужно подумать о более корректной работе с pools
+    Returns the application-wide client created in lifespan
     """
-    repo = RedisRepository(redis_url=settings.REDIS_URL)
-    try:
-        yield repo
-    finally:
-        await repo.close()
+    return request.app.state.redis
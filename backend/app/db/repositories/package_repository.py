@@ -1,23 +1,48 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 
 from app.api.v1.schemas.package import (
+    PackageBase,
     PackageCreate,
     PackageOut,
     PackageUpdate,
 )
+from app.core.constants import CONTENT_COST_RATE, WEIGHT_RATE
+from app.core.tracing import traced
 from app.db.models.package import Package
+from app.db.models.user_session import UserSession
 from app.db.repositories.base import BaseCRUDRepository
-from sqlalchemy import select
+from sqlalchemy import Row, delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 
+def delivery_cost_expression(usd_rate: float):
+    """SQL counterpart of DeliveryCostCalculator.calculate_delivery_cost."""
+    return func.round(
+        (Package.weight * WEIGHT_RATE + Package.content_cost * CONTENT_COST_RATE)
+        * usd_rate,
+        2,
+    )
+
+
+def _session_expired(expired_before: datetime):
+    """The package's session exists and is inactive since ``expired_before``"""
+    return (
+        select(UserSession.id)
+        .where(UserSession.id == Package.user_session)
+        .where(UserSession.last_activity < expired_before)
+        .exists()
+    )
+
+
 class PackageRepository(
     BaseCRUDRepository[Package, PackageOut, PackageCreate, PackageUpdate]
 ):
     def __init__(self, session: AsyncSession):
         self.session: AsyncSession = session
 
+    @traced()
     async def get(self, id: int, user_session: str) -> Optional[PackageOut]:
         query = (
             select(Package)
@@ -31,6 +56,7 @@ class PackageRepository(
             return PackageOut.model_validate(db_instance)
         return None
 
+    @traced()
     async def list(
         self, user_session: str, skip: int = 0, limit: int = 100
     ) -> List[PackageOut]:
@@ -38,12 +64,55 @@ class PackageRepository(
             select(Package)
             .options(joinedload(Package.type))
             .where(Package.user_session == user_session)
+            .order_by(Package.id)
+            .offset(skip)
+            .limit(limit)
         )
         db_instances = await self.session.execute(query)
         results = db_instances.scalars().all()
         output = [PackageOut.model_validate(record) for record in results]
         return output
 
+    @traced()
+    async def list_after(
+        self, user_session: str, after_id: Optional[int] = None, limit: int = 100
+    ) -> List[PackageOut]:
+        """Keyset page of packages with ``id`` greater than ``after_id``.
+
+        Uses the ``(user_session, id)`` index, so every page costs the same
+        regardless of how deep into the result set it is.
+        """
+        query = (
+            select(Package)
+            .options(joinedload(Package.type))
+            .where(Package.user_session == user_session)
+        )
+        if after_id is not None:
+            query = query.where(Package.id > after_id)
+        query = query.order_by(Package.id).limit(limit)
+
+        db_instances = await self.session.execute(query)
+        results = db_instances.scalars().all()
+        return [PackageOut.model_validate(record) for record in results]
+
+    async def stream_rows(
+        self, user_session: str, columns: Sequence[str], batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Stream raw column rows of a session's packages in batches.
+
+        Uses a server-side cursor, so only one batch is held in memory at a time.
+        """
+        query = (
+            select(*(getattr(Package, column) for column in columns))
+            .where(Package.user_session == user_session)
+            .order_by(Package.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+    @traced()
     async def create(self, obj_in: PackageCreate) -> PackageOut:
         db_obj = Package(
             name=obj_in.name,
@@ -57,20 +126,202 @@ class PackageRepository(
         await self.session.refresh(db_obj)
         return PackageOut.model_validate(db_obj)
 
-    async def update(self, db_obj: Package, obj_in: PackageUpdate) -> PackageOut:
-        return await super().update(db_obj, obj_in)
+    @traced()
+    async def bulk_create(
+        self, packages: Sequence[PackageBase], user_session: str
+    ) -> List[int]:
+        """Insert many packages in one statement and one transaction.
+
+        Returns:
+            List[int]: Ids assigned to the packages, in input order
+        """
+        rows = [
+            {**package.model_dump(), "user_session": user_session}
+            for package in packages
+        ]
+
+        if self.session.bind.dialect.insert_executemany_returning:
+            result = await self.session.execute(
+                insert(Package).returning(Package.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = list(result.scalars())
+        else:
+            # MySQL has no RETURNING. LAST_INSERT_ID() is the id of the first row
+            # of a multi-row INSERT, and InnoDB reserves the whole block at once.
+            result = await self.session.execute(insert(Package.__table__).values(rows))
+            ids = list(range(result.lastrowid, result.lastrowid + len(rows)))
 
+        await self.session.commit()
+        return ids
+
+    @traced()
+    async def update(self, id: int, obj_in: PackageUpdate) -> Optional[PackageOut]:
+        db_obj = await self.session.get(Package, id)
+        if db_obj is None:
+            return None
+
+        data = obj_in.model_dump(exclude_unset=True)
+        pricing_changed = (
+            data.get("weight", db_obj.weight) != db_obj.weight
+            or data.get("content_cost", db_obj.content_cost) != db_obj.content_cost
+        )
+        for field, value in data.items():
+            setattr(db_obj, field, value)
+        if pricing_changed and "delivery_cost" not in data:
+            # Stale price: let the delivery cost workers recalculate it
+            db_obj.delivery_cost = None
+
+        await self.session.commit()
+        await self.session.refresh(db_obj)
+        return PackageOut.model_validate(db_obj)
+
+    @traced()
     async def delete(self, id: int) -> Optional[PackageOut]:
-        return await super().delete(id)
+        db_obj = await self.session.get(Package, id)
+        if db_obj is None:
+            return None
+        deleted = PackageOut.model_validate(db_obj)
+        await self.session.delete(db_obj)
+        await self.session.commit()
+        return deleted
 
-    async def get_unprocessed_packages(self) -> List[Package]:
-        """Get all packages without delivery cost."""
-        query = select(Package).where(Package.delivery_cost.is_(None))
+    @traced()
+    async def get_unprocessed_packages(
+        self, limit: int, after_id: int = 0
+    ) -> List[Package]:
+        """Lock up to ``limit`` unprocessed packages with an id above ``after_id``.
+
+        The ORM counterpart of ``claim_unprocessed``: rows locked by another
+        scheduler are skipped and packages that cannot be priced are left out.
+        The locks are held until ``bulk_update_delivery_costs`` commits.
+        """
+        query = (
+            select(Package)
+            .where(Package.delivery_cost.is_(None))
+            .where(Package.weight.is_not(None), Package.content_cost.is_not(None))
+            .where(Package.id > after_id)
+            .order_by(Package.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    @traced()
     async def bulk_update_delivery_costs(self, packages: List[Package]) -> None:
         """Update delivery costs for multiple packages."""
         for package in packages:
             self.session.add(package)
         await self.session.commit()
+
+    @traced()
+    async def price_packages(self, ids: Sequence[int], usd_rate: float) -> int:
+        """Set delivery cost for the given packages unless already priced.
+
+        Returns:
+            int: Number of packages priced
+        """
+        query = (
+            update(Package)
+            .where(Package.id.in_(ids))
+            .where(Package.delivery_cost.is_(None))
+            .values(delivery_cost=delivery_cost_expression(usd_rate))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        await self.session.commit()
+        return result.rowcount
+
+    @traced()
+    async def count_unprocessed_packages(self) -> int:
+        query = select(func.count()).where(Package.delivery_cost.is_(None))
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    @traced()
+    async def claim_unprocessed(
+        self, limit: int, after_id: int = 0
+    ) -> List[Tuple[int, str]]:
+        """Lock up to ``limit`` unprocessed packages with an id above ``after_id``.
+
+        Rows already locked by another worker are skipped, so concurrent
+        schedulers claim disjoint chunks. The locks are held until the
+        transaction ends, normally by the ``price_packages`` commit. Packages
+        without a weight or content cost cannot be priced and are never
+        claimed.
+
+        Returns:
+            List[Tuple[int, str]]: ``(id, user_session)`` of the claimed packages
+        """
+        query = (
+            select(Package.id, Package.user_session)
+            .where(Package.delivery_cost.is_(None))
+            .where(Package.weight.is_not(None), Package.content_cost.is_not(None))
+            .where(Package.id > after_id)
+            .order_by(Package.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def list_session_package_ids(
+        self, user_sessions: Sequence[str], limit: int, expired_before: datetime
+    ) -> List[Tuple[int, str]]:
+        """Up to ``limit`` packages of the given sessions as ``(id, user_session)``
+
+        Only sessions still inactive since ``expired_before`` are included.
+        """
+        query = (
+            select(Package.id, Package.user_session)
+            .where(Package.user_session.in_(user_sessions))
+            .where(_session_expired(expired_before))
+            .order_by(Package.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def list_orphaned(
+        self, after_id: int = 0, limit: int = 500
+    ) -> List[Tuple[int, Optional[str]]]:
+        """Packages without an existing session, in id order after ``after_id``"""
+        session_exists = select(UserSession.id).where(
+            UserSession.id == Package.user_session
+        )
+        query = (
+            select(Package.id, Package.user_session)
+            .where(Package.id > after_id)
+            .where(Package.user_session.is_(None) | ~session_exists.exists())
+            .order_by(Package.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def delete_many(
+        self, ids: Sequence[int], expired_before: Optional[datetime] = None
+    ) -> int:
+        """Delete packages by id in one statement.
+
+        Args:
+            ids: Ids of the packages to delete
+            expired_before: Only delete packages whose session is still
+                inactive since then, re-checked by the DELETE itself
+
+        Returns:
+            int: Number of packages deleted
+        """
+        if not ids:
+            return 0
+        query = (
+            delete(Package)
+            .where(Package.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        if expired_before is not None:
+            query = query.where(_session_expired(expired_before))
+        result = await self.session.execute(query)
+        await self.session.commit()
+        return result.rowcount
@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
 
 from app.db.models.user_session import UserSession
-from sqlalchemy import select
+from sqlalchemy import case, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -26,3 +27,64 @@ class UserSessionRepository:
         if session:
             session.last_activity = datetime.now(timezone.utc)
             await self.session.commit()
+
+    async def bulk_update_last_activity(self, activity: Dict[str, datetime]) -> int:
+        """Set last_activity of many sessions with one UPDATE ... CASE.
+
+        Args:
+            activity: Last activity time by session id
+
+        Returns:
+            int: Number of sessions updated
+        """
+        if not activity:
+            return 0
+        query = (
+            update(UserSession)
+            .where(UserSession.id.in_(activity))
+            .values(last_activity=case(activity, value=UserSession.id))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        await self.session.commit()
+        return result.rowcount
+
+    async def list_expired_ids(
+        self, cutoff: datetime, after_id: Optional[str] = None, limit: int = 500
+    ) -> List[str]:
+        """Ids of sessions inactive since ``cutoff``, in id order after ``after_id``"""
+        query = select(UserSession.id).where(UserSession.last_activity < cutoff)
+        if after_id is not None:
+            query = query.where(UserSession.id > after_id)
+        query = query.order_by(UserSession.id).limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def delete_expired(
+        self, session_ids: Sequence[str], cutoff: datetime
+    ) -> List[str]:
+        """Delete the given sessions unless they became active again.
+
+        The sessions are locked while their expiry is re-checked, so activity
+        written meanwhile keeps a session.
+
+        Returns:
+            List[str]: Ids of the sessions deleted
+        """
+        if not session_ids:
+            return []
+        query = (
+            select(UserSession.id)
+            .where(UserSession.id.in_(session_ids))
+            .where(UserSession.last_activity < cutoff)
+            .with_for_update()
+        )
+        expired = list((await self.session.execute(query)).scalars().all())
+        if expired:
+            await self.session.execute(
+                delete(UserSession)
+                .where(UserSession.id.in_(expired))
+                .execution_options(synchronize_session=False)
+            )
+        await self.session.commit()
+        return expired
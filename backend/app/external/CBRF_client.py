@@ -1,13 +1,102 @@
-from typing import Any, AsyncGenerator, TypedDict
+from array import array
+from typing import Any, AsyncGenerator, Dict, NotRequired, Optional, Sequence, TypedDict
 
 from app.core.config import settings
+from app.core.tracing import traced
 
 from .base_client import BaseAPIClient
 
+BASE_CURRENCY = "RUB"
+
 
 class CBRFResponse(TypedDict):
     Date: str
     Valute: float
+    # Publication time of the rates, used to schedule the next refresh
+    Timestamp: NotRequired[str]
+
+
+class RateTable:
+    """Exchange rates of one CBRF publication, in rubles.
+
+    Currency codes are indexed once into compact float arrays, so a lookup
+    is a dict hit plus an array read and nothing is rebuilt per request.
+    Rubles are part of the table with a rate of 1.
+    """
+
+    __slots__ = ("date", "timestamp", "codes", "_index", "_nominals", "_values")
+
+    def __init__(
+        self,
+        date: str,
+        codes: Sequence[str],
+        nominals: Sequence[int],
+        values: Sequence[float],
+        timestamp: Optional[str] = None,
+    ):
+        self.date = date
+        self.timestamp = timestamp
+        self.codes = tuple(codes)
+        self._index = {code: position for position, code in enumerate(self.codes)}
+        self._nominals = array("i", nominals)
+        self._values = array("d", values)
+
+    @classmethod
+    def from_valute(
+        cls,
+        date: str,
+        valute: Dict[str, Dict[str, Any]],
+        timestamp: Optional[str] = None,
+    ) -> "RateTable":
+        """Build the table from the ``Valute`` map of daily_json.js"""
+        codes = [BASE_CURRENCY]
+        nominals = [1]
+        values = [1.0]
+        for code, currency in valute.items():
+            codes.append(code)
+            nominals.append(int(currency["Nominal"]))
+            values.append(float(currency["Value"]))
+        return cls(date, codes, nominals, values, timestamp)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RateTable":
+        return cls(
+            data["date"],
+            data["codes"],
+            data["nominals"],
+            data["values"],
+            data.get("timestamp"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "date": self.date,
+            "timestamp": self.timestamp,
+            "codes": list(self.codes),
+            "nominals": self._nominals.tolist(),
+            "values": self._values.tolist(),
+        }
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def rate(self, code: str) -> float:
+        """Rubles per one unit of ``code``.
+
+        Raises:
+            ValueError: If the currency is not in the table
+        """
+        position = self._index.get(code)
+        if position is None:
+            raise ValueError(f"Unknown currency: {code}")
+        return self._values[position] / self._nominals[position]
+
+    def daily_rates(self) -> CBRFResponse:
+        """USD view of the table, as returned by CBRFClient.get_daily_rates"""
+        rates = CBRFResponse(Date=self.date, Valute=self.rate("USD"))
+        if self.timestamp:
+            rates["Timestamp"] = self.timestamp
+        return rates
 
 
 class CBRFClient(BaseAPIClient):
@@ -15,15 +104,31 @@ class CBRFClient(BaseAPIClient):
         super().__init__()
         self.base_url = str(settings.CBR_API_URL)
 
+    @traced()
     async def get_daily_rates(self) -> CBRFResponse:
         """GET currency rates data of USD
 
         Returns:
             CBRFResponse: Dictionary containing currency rates data
         """
-        response = await self.request("GET", "daily_json.js")
+        response = await self.request("GET", "daily_json.js", conditional=True)
         usd_rate = response["Valute"]["USD"]["Value"]
-        return CBRFResponse(Date=response["Date"], Valute=usd_rate)
+        rates = CBRFResponse(Date=response["Date"], Valute=usd_rate)
+        if "Timestamp" in response:
+            rates["Timestamp"] = response["Timestamp"]
+        return rates
+
+    @traced()
+    async def get_rate_table(self) -> RateTable:
+        """GET rates of every currency published by CBRF
+
+        Returns:
+            RateTable: Rates of all currencies in rubles
+        """
+        response = await self.request("GET", "daily_json.js", conditional=True)
+        return RateTable.from_valute(
+            response["Date"], response["Valute"], response.get("Timestamp")
+        )
 
 
 async def get_cbrf_client() -> AsyncGenerator[CBRFClient, Any]:
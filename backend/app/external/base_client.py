@@ -5,6 +5,8 @@ and error handling. It uses httpx for async HTTP operations.
 
 Classes:
     RequestKwargs: TypedDict for request keyword arguments
+    HTTPClientRegistry: Application-scoped pool of shared httpx clients
+    CircuitBreaker: Per-host breaker that fails fast while an upstream is down
     BaseAPIClient: Base class for implementing API clients with retry logic
 
 Example:
@@ -12,15 +14,21 @@ Example:
         response = await client._request('GET', '/endpoint')
 """
 
+import asyncio
+import importlib.util
+import random
+import time
 from types import TracebackType
-from typing import Any, Dict, Optional, TypedDict
+from typing import Any, ClassVar, Dict, NamedTuple, Optional, TypedDict
 
 import httpx
 from httpx import AsyncClient
 
 from app.core.config import settings
-from app.core.exceptions import ExternalAPIClientError
+from app.core.exceptions import CircuitOpenError, ExternalAPIClientError
 from app.core.logger import logger
+from app.core.metrics import EXTERNAL_API_REQUEST_DURATION, EXTERNAL_API_RETRIES
+from app.core.tracing import tracer
 
 
 class RequestKwargs(TypedDict, total=False):
@@ -54,6 +62,188 @@ class RequestKwargs(TypedDict, total=False):
     cookies: Dict[str, str]
 
 
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitBreaker:
+    """Circuit breaker for a single upstream host.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are rejected without being sent. Once ``recovery_timeout``
+    seconds have passed a single trial request is let through: success closes
+    the circuit, failure opens it again. A trial that ends without an outcome,
+    e.g. because it was cancelled, is released so the next request can try.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by upstream host, shared by all clients."""
+
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings.EXTERNAL_API_CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=settings.EXTERNAL_API_CIRCUIT_RECOVERY_TIMEOUT,
+            )
+            self._breakers[host] = breaker
+        return breaker
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+class HTTPClientRegistry:
+    """Application-scoped registry of long-lived httpx clients.
+
+    One AsyncClient is kept per base URL, so its keep-alive connection pool is
+    reused by every BaseAPIClient instead of paying TCP and TLS setup on each
+    use. The registry is started and closed in the application lifespan; when
+    it is not running, BaseAPIClient falls back to a private client.
+
+    Example:
+        http_clients.start()
+        async with CBRFClient() as client:  # borrows the shared client
+            await client.get_daily_rates()
+        await http_clients.aclose()
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+        self._connections_opened: Dict[str, int] = {}
+        self._started = False
+
+    @property
+    def is_started(self) -> bool:
+        return self._started
+
+    def start(self) -> None:
+        self._started = True
+
+    def get_client(self, base_url: str, timeout: float) -> AsyncClient:
+        """Return the shared client for ``base_url``, creating it on first use."""
+        client = self._clients.get(base_url)
+        if client is None:
+            client = AsyncClient(
+                base_url=base_url,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.EXTERNAL_API_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.EXTERNAL_API_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.EXTERNAL_API_KEEPALIVE_EXPIRY,
+                ),
+                http2=self._http2_enabled(),
+                event_hooks={"request": [self._request_hook(base_url)]},
+            )
+            self._clients[base_url] = client
+            self._requests[base_url] = 0
+            self._connections_opened[base_url] = 0
+        return client
+
+    def _request_hook(self, base_url: str):
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._connections_opened[base_url] += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            self._requests[base_url] += 1
+            request.extensions["trace"] = trace
+
+        return on_request
+
+    @staticmethod
+    def _http2_enabled() -> bool:
+        if not settings.EXTERNAL_API_HTTP2:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is missing")
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Request and connection counters per base URL.
+
+        ``requests`` greater than ``connections_opened`` means connections
+        are being reused.
+        """
+        stats = {}
+        for base_url, client in self._clients.items():
+            # httpx keeps the connection pool private; report nothing if it moves
+            transport = getattr(client, "_transport", None)
+            pool = getattr(transport, "_pool", None)
+            connections = list(getattr(pool, "connections", None) or [])
+            stats[base_url] = {
+                "requests": self._requests[base_url],
+                "connections_opened": self._connections_opened[base_url],
+                "open_connections": len(connections),
+                "idle_connections": sum(
+                    bool(getattr(c, "is_idle", lambda: False)()) for c in connections
+                ),
+            }
+        return stats
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._requests.clear()
+        self._connections_opened.clear()
+        self._started = False
+
+
+http_clients = HTTPClientRegistry()
+
+
+class ConditionalCacheEntry(NamedTuple):
+    """Validators and parsed body of the last 200 response for a URL."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+
+
 class BaseAPIClient:
     """Base client for making HTTP requests with retry functionality.
 
@@ -66,6 +256,8 @@ class BaseAPIClient:
         base_url: Base URL for all requests
         timeout: Request timeout in seconds
         max_retries: Maximum number of retry attempts on failure
+        backoff_base: First retry delay ceiling in seconds, doubled per attempt
+        backoff_max: Upper bound for the retry delay ceiling
 
     Example:
         async with BaseAPIClient() as client:
@@ -75,18 +267,29 @@ class BaseAPIClient:
                 logger.error(f"Request failed: {e}")
     """
 
+    # Conditional GET validators, shared by all instances as they are short-lived
+    _conditional_cache: ClassVar[Dict[str, ConditionalCacheEntry]] = {}
+
     def __init__(self) -> None:
         self.client: Optional[AsyncClient] = None
         self.base_url: str = ""
         self.timeout: int = settings.EXTERNAL_API_TIMEOUT
         self.max_retries: int = settings.EXTERNAL_API_MAX_RETRIES
+        self.backoff_base: float = settings.EXTERNAL_API_BACKOFF_BASE
+        self.backoff_max: float = settings.EXTERNAL_API_BACKOFF_MAX
+        self._owns_client: bool = False
 
     async def __aenter__(self) -> "BaseAPIClient":
-        self.client = AsyncClient(
-            base_url=self.base_url,
-            timeout=self.timeout,
-            limits=httpx.Limits(max_connections=100),
-        )
+        if http_clients.is_started:
+            self.client = http_clients.get_client(self.base_url, self.timeout)
+            self._owns_client = False
+        else:
+            self.client = AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=100),
+            )
+            self._owns_client = True
         return self
 
     async def __aexit__(
@@ -95,13 +298,42 @@ class BaseAPIClient:
         exc: Optional[BaseException],
         tb: Optional[TracebackType],
     ) -> None:
-        if self.client is not None:
+        if self.client is not None and self._owns_client:
             await self.client.aclose()
 
-    async def request(
-        self, method: str, endpoint: str, **kwargs: Any
-    ) -> Dict[str, Any]:
-        """Make an HTTP request with retry functionality.
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Transport failures and overloaded upstreams are worth retrying."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, httpx.TransportError)
+
+    @staticmethod
+    def _observe_attempt(
+        host: str, start_time: float, error: Optional[Exception] = None
+    ) -> None:
+        """Record one request attempt in the external API metrics."""
+        if error is None:
+            outcome = "ok"
+        elif isinstance(error, httpx.HTTPStatusError):
+            outcome = str(error.response.status_code)
+        else:
+            outcome = "error"
+        EXTERNAL_API_REQUEST_DURATION.observe(
+            time.perf_counter() - start_time, host, outcome
+        )
+
+    async def send(self, method: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        """Send an HTTP request with retries and circuit breaking.
+
+        Retryable failures (transport errors, 429 and 5xx) are retried with
+        exponential backoff and jitter. Other errors, such as 4xx, are raised
+        immediately. While the upstream host's circuit is open, requests fail
+        fast without touching the network.
 
         Args:
             method: HTTP method (GET, POST, etc.)
@@ -109,34 +341,125 @@ class BaseAPIClient:
             **kwargs: Additional request parameters
 
         Returns:
-            Dict containing the JSON response
+            httpx.Response with a successful status
 
         Raises:
             RuntimeError: If client is not initialized
+            CircuitOpenError: If the upstream host's circuit is open
             ExternalAPIClientError: If max retries are exceeded
-            Exception: For other request failures
+            Exception: For non-retryable request failures
         """
         if self.client is None:
             raise RuntimeError("Client not initialized")
 
+        host = str(self.client.base_url.host)
+        breaker = circuit_breakers.get(host)
         headers = kwargs.pop("headers", {})
         headers.update(
             {"User-Agent": settings.USER_AGENT, "Content-Type": "application/json"}
         )
 
-        for attempt in range(self.max_retries + 1):
-            try:
-                response = await self.client.request(
-                    method=method, url=endpoint, headers=headers, **kwargs
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(
-                    "API request failed",
-                    extra={"attempt": attempt, "error": str(e), "endpoint": endpoint},
-                )
-                if attempt == self.max_retries:
+        with tracer.span(
+            "http.client",
+            **{"http.method": method, "server.address": host, "url.path": endpoint},
+        ) as span:
+            for attempt in range(self.max_retries + 1):
+                span.set_attribute("http.attempts", attempt + 1)
+                if not breaker.allow_request():
+                    raise CircuitOpenError("Circuit open for upstream host")
+                start_time = time.perf_counter()
+                try:
+                    response = await self.client.request(
+                        method=method, url=endpoint, headers=headers, **kwargs
+                    )
+                    if span.recording:
+                        span.set_attribute("http.status_code", response.status_code)
+                    response.raise_for_status()
+                except Exception as e:
+                    self._observe_attempt(host, start_time, e)
+                    if (
+                        isinstance(e, httpx.HTTPStatusError)
+                        and e.response.status_code == httpx.codes.NOT_MODIFIED
+                    ):
+                        # Answer to a conditional request, not an error
+                        breaker.record_success()
+                        return e.response
+                    retryable = self._is_retryable(e)
+                    logger.error(
+                        "API request failed",
+                        extra={
+                            "attempt": attempt,
+                            "error": str(e),
+                            "endpoint": endpoint,
+                            "retryable": retryable,
+                        },
+                    )
+                    if not retryable:
+                        # The upstream answered; the request itself is at fault
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    if attempt == self.max_retries:
+                        raise ExternalAPIClientError("Max retries exceeded") from e
+                    EXTERNAL_API_RETRIES.inc(host)
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                except BaseException:
+                    # Cancelled mid-attempt: no outcome to record
+                    breaker.release_trial()
                     raise
+                else:
+                    self._observe_attempt(host, start_time)
+                    breaker.record_success()
+                    return response
+
+            raise ExternalAPIClientError("Max retries exceeded")
+
+    async def request(
+        self, method: str, endpoint: str, conditional: bool = False, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Make an HTTP request with retry functionality.
+
+        With ``conditional=True`` the ETag and Last-Modified validators of the
+        previous response are sent back, and a 304 answer returns the body
+        parsed last time without downloading or decoding it again.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: URL endpoint to request
+            conditional: Revalidate against the cached response
+            **kwargs: Additional request parameters
+
+        Returns:
+            Dict containing the JSON response
+
+        Raises:
+            RuntimeError: If client is not initialized
+            CircuitOpenError: If the upstream host's circuit is open
+            ExternalAPIClientError: If max retries are exceeded
+            Exception: For other request failures
+        """
+        if not conditional:
+            response = await self.send(method, endpoint, **kwargs)
+            return response.json()
+
+        cache_key = f"{self.base_url}{endpoint}"
+        cached = self._conditional_cache.get(cache_key)
+        headers = kwargs.pop("headers", {})
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self.send(method, endpoint, headers=headers, **kwargs)
+        if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+            return cached.data
 
-        raise ExternalAPIClientError("Max retries exceeded")
+        data = response.json()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._conditional_cache[cache_key] = ConditionalCacheEntry(
+                etag, last_modified, data
+            )
+        return data
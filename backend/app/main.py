@@ -4,13 +4,26 @@ from typing import Optional
 from fastapi import FastAPI
 
 from app.api import api_router
+from app.core.config import settings
+from app.core.metrics import instrument_pool
 from app.core.scheduler import DeliveryCostScheduler
+from app.core.tracing import configure_tracing, tracer
 from app.db.base import init_db
+from app.db.instrumentation import instrument_engine
 from app.db.mysql import AsyncSessionLocal, async_engine
+from app.db.redis import RedisRepository
+from app.external.base_client import http_clients
 from app.middleware.exception_handler import setup_exception_handlers
 from app.middleware.logging import LoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiler import ProfilerMiddleware
 from app.middleware.session import SessionMiddleware
 from app.seed.package_types import seed_package_types
+from app.services.cbrf import CBRFRateRefresher, CBRFService
+from app.services.delivery_cost_queue import DeliveryCostQueue
+from app.services.package_cache import PackageCache
+from app.services.session_validator import SessionValidator
+from app.taks.session_cleanup import SessionCleanupJob
 
 scheduler: Optional[DeliveryCostScheduler] = None
 
@@ -21,9 +34,73 @@ async def lifespan(app: FastAPI):
     await init_db(async_engine)
     await seed_package_types()
 
+    configure_tracing()
+    instrument_pool(async_engine.pool)
+    instrument_engine(async_engine)
+
+    # Outgoing HTTP connections are pooled for the application lifetime
+    http_clients.start()
+
+    # Summaries of suppressed error tracebacks are logged every window
+    error_log_limiter = app.state.error_log_limiter
+    await error_log_limiter.start()
+
+    # One pooled Redis client for the whole application
+    redis = RedisRepository(settings.REDIS_URL, settings.REDIS_POOL_SIZE)
+    app.state.redis = redis
+
+    # Exchange rates are cached per process and shared through Redis
+    cbrf_service = CBRFService(redis)
+    app.state.cbrf_service = cbrf_service
+    rate_refresher = CBRFRateRefresher(cbrf_service)
+    await rate_refresher.start()
+
+    # Known sessions are cached, last_activity is written in batches
+    session_validator = SessionValidator(AsyncSessionLocal, redis)
+    await session_validator.start()
+    app.state.session_validator = session_validator
+
+    package_cache: Optional[PackageCache] = None
+    if settings.PACKAGE_CACHE_ENABLED:
+        package_cache = PackageCache(redis)
+    app.state.package_cache = package_cache
+
+    # Start delivery cost workers
+    delivery_cost_queue: Optional[DeliveryCostQueue] = None
+    interval_seconds = settings.DELIVERY_COST_INTERVAL
+    if settings.DELIVERY_COST_QUEUE_ENABLED:
+        delivery_cost_queue = DeliveryCostQueue(
+            AsyncSessionLocal,
+            cbrf_service,
+            workers=settings.DELIVERY_COST_QUEUE_WORKERS,
+            batch_size=settings.DELIVERY_COST_QUEUE_BATCH_SIZE,
+            batch_window=settings.DELIVERY_COST_QUEUE_BATCH_WINDOW,
+            package_cache=package_cache,
+        )
+        await delivery_cost_queue.start()
+        interval_seconds = settings.DELIVERY_COST_SWEEP_INTERVAL
+    app.state.delivery_cost_queue = delivery_cost_queue
+
+    # Expired sessions and their packages are removed in small batches
+    session_cleanup: Optional[SessionCleanupJob] = None
+    if settings.SESSION_AUTO_CLEANUP:
+        session_cleanup = SessionCleanupJob(
+            AsyncSessionLocal,
+            session_validator=session_validator,
+            package_cache=package_cache,
+        )
+        await session_cleanup.start()
+
     # Start scheduler
     global scheduler
-    scheduler = DeliveryCostScheduler(AsyncSessionLocal)
+    scheduler = DeliveryCostScheduler(
+        AsyncSessionLocal,
+        interval_seconds=interval_seconds,
+        set_based=settings.DELIVERY_COST_SET_BASED,
+        chunk_size=settings.DELIVERY_COST_CHUNK_SIZE,
+        cbrf_service=cbrf_service,
+        package_cache=package_cache,
+    )
     await scheduler.start()
 
     yield
@@ -31,6 +108,16 @@ async def lifespan(app: FastAPI):
     # Stop scheduler
     if scheduler:
         await scheduler.stop()
+    if delivery_cost_queue:
+        await delivery_cost_queue.stop()
+    if session_cleanup:
+        await session_cleanup.stop()
+    await rate_refresher.stop()
+    await session_validator.stop()
+    await error_log_limiter.stop()
+    await redis.close()
+    await http_clients.aclose()
+    tracer.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -38,6 +125,8 @@ app = FastAPI(lifespan=lifespan)
 # Add the logging middleware
 app.add_middleware(SessionMiddleware)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilerMiddleware)
 setup_exception_handlers(app)
 
 
@@ -3,29 +3,244 @@
 This module provides setup for handling different types of exceptions in the FastAPI application:
 - AppException: Custom application exceptions
 - HTTPException: FastAPI HTTP exceptions
-- Exception: Generic fallback handler for unhandled exceptions
+- Exception: Generic fallback for unhandled exceptions, answered by
+  UnhandledErrorMiddleware
 
 Each handler:
 - Logs the exception with request ID
 - Returns appropriate status code and error message
 - Includes request ID in response for support reference
+
+Client errors (4xx) are logged as one line without a traceback. Server
+errors go through ErrorLogLimiter: identical errors, grouped by a
+fingerprint of the exception type and the line that raised it, log a
+traceback at most ``ERROR_LOG_BURST`` times per ``ERROR_LOG_WINDOW``; the
+rest are counted and reported as "N similar errors suppressed".
+
+Unhandled exceptions are not left to an ``Exception`` handler: Starlette
+runs that handler in ServerErrorMiddleware and re-raises afterwards, so the
+server would log every traceback again. UnhandledErrorMiddleware answers
+them inside that layer instead.
 """
 
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.config import settings
 from app.core.exceptions import AppException
 from app.core.logger import logger
 
+# Fingerprint collecting errors once the limiter tracks too many
+OTHER_ERRORS = "other errors"
+
+
+def exception_fingerprint(exc: BaseException) -> str:
+    """Exception type and the innermost frame of its traceback."""
+    fingerprint = f"{type(exc).__module__}.{type(exc).__qualname__}"
+    tb = exc.__traceback__
+    if tb is None:
+        return fingerprint
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    code = tb.tb_frame.f_code
+    return f"{fingerprint} at {code.co_filename}:{tb.tb_lineno} in {code.co_name}"
+
+
+class ErrorLogLimiter:
+    """Rate-limits traceback logging per error fingerprint.
+
+    Each fingerprint may log ``burst`` tracebacks per ``window`` seconds.
+    Further occurrences are only counted; when a window ends the count is
+    logged as a single summary line, so an error flood costs a bounded
+    number of log records regardless of the request rate. ``start`` runs a
+    flush every window, so the summary of a flood that stopped is logged
+    without waiting for the next error.
+    """
+
+    def __init__(
+        self,
+        burst: int = settings.ERROR_LOG_BURST,
+        window: float = settings.ERROR_LOG_WINDOW,
+        max_fingerprints: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.burst = burst
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.clock = clock
+        # fingerprint -> [window start, logged, suppressed]
+        self._windows: Dict[str, list] = {}
+        self._last_sweep = clock()
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+
+    def allow(self, fingerprint: str) -> bool:
+        """Count an occurrence; True if its traceback should be logged."""
+        now = self.clock()
+        if now - self._last_sweep >= self.window:
+            self.flush(now)
+
+        state = self._windows.get(fingerprint)
+        if state is None:
+            if len(self._windows) >= self.max_fingerprints:
+                fingerprint = OTHER_ERRORS
+                state = self._windows.setdefault(fingerprint, [now, self.burst, 0])
+            else:
+                state = self._windows[fingerprint] = [now, 0, 0]
+        elif now - state[0] >= self.window:
+            self._summarize(fingerprint, state)
+            state[:] = [now, 0, 0]
+
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> None:
+        """Log summaries for windows that have ended and forget them.
+
+        Args:
+            now: Current clock value, read from ``clock`` if not given
+            force: Also summarize windows that are still open
+        """
+        now = self.clock() if now is None else now
+        self._last_sweep = now
+        for fingerprint, state in list(self._windows.items()):
+            if force or now - state[0] >= self.window:
+                self._summarize(fingerprint, state)
+                del self._windows[fingerprint]
+
+    def _summarize(self, fingerprint: str, state: list) -> None:
+        if state[2]:
+            logger.error(
+                f"{state[2]} similar errors suppressed in the last "
+                f"{self.window:.0f} sec: {fingerprint}",
+                extra={"fingerprint": fingerprint, "suppressed": state[2]},
+            )
+
+    def suppressed(self) -> Dict[str, int]:
+        return {
+            fingerprint: state[2]
+            for fingerprint, state in self._windows.items()
+            if state[2]
+        }
+
+    async def start(self) -> None:
+        """Start flushing ended windows in the background."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+
+        async def run_flusher():
+            while self.is_running:
+                await asyncio.sleep(self.window)
+                self.flush()
+
+        self.task = asyncio.create_task(run_flusher())
+
+    async def stop(self) -> None:
+        """Stop the flusher and log what is still suppressed."""
+        if self.is_running and self.task:
+            self.is_running = False
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.flush(force=True)
+
+
+def log_exception(
+    limiter: ErrorLogLimiter,
+    kind: str,
+    request: Request,
+    exc: Exception,
+    status_code: int,
+) -> None:
+    request_id = getattr(request.state, "request_id", "unknown")
+    message = f"{kind} for RequestID: {request_id}. Exception: {exc}"
+    if status_code < 500:
+        logger.warning(message, extra={"status": status_code})
+        return
+    fingerprint = exception_fingerprint(exc)
+    if limiter.allow(fingerprint):
+        logger.error(
+            message,
+            exc_info=exc,
+            extra={"status": status_code, "fingerprint": fingerprint},
+        )
+
+
+class UnhandledErrorMiddleware:
+    """Answers exceptions that no handler caught with a 500.
+
+    The exception is logged through the limiter and not re-raised, so it
+    never reaches ServerErrorMiddleware or the server. If the response had
+    already started, its body is ended where it broke off.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: ErrorLogLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+        response_complete = False
+
+        async def send_tracking_progress(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body":
+                response_complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracking_progress)
+        except Exception as exc:
+            request = Request(scope)
+            log_exception(self.limiter, "Unhandled error", request, exc, 500)
+            if response_started:
+                if not response_complete:
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            request_id = getattr(request.state, "request_id", "unknown")
+            response = JSONResponse(
+                status_code=500,
+                content={
+                    "detail": f"Internal server error. Please contact support with RequestID: {request_id}"
+                },
+            )
+            await response(scope, receive, send)
+
+
+def setup_exception_handlers(app: FastAPI, limiter: Optional[ErrorLogLimiter] = None):
+    """Register the handlers and UnhandledErrorMiddleware.
+
+    Call it after adding the other middleware. The limiter is kept in
+    ``app.state``; the lifespan starts and stops
+    ``app.state.error_log_limiter``.
+    """
+    limiter = limiter or ErrorLogLimiter()
+    app.state.error_log_limiter = limiter
+    # Added last, so it wraps the other middleware and sees their errors too
+    app.add_middleware(UnhandledErrorMiddleware, limiter=limiter)
 
-def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(AppException)
     async def custom_exception_handler(request: Request, exc: AppException):
         request_id = getattr(request.state, "request_id", "unknown")
-        logger.error(
-            f"Application error for RequestID: {request_id}. Exception: {exc}",
-            exc_info=True,
-        )
+        log_exception(limiter, "Application error", request, exc, exc.status_code)
         return JSONResponse(
             status_code=exc.status_code,
             content={
@@ -33,27 +248,10 @@ def setup_exception_handlers(app: FastAPI):
             },
         )
 
-    @app.exception_handler(Exception)
-    async def generic_exception_handler(request: Request, exc: Exception):
-        request_id = getattr(request.state, "request_id", "unknown")
-        logger.error(
-            f"Unhandled error for RequestID: {request_id}. Exception: {exc}",
-            exc_info=True,
-        )
-        return JSONResponse(
-            status_code=500,
-            content={
-                "detail": f"Internal server error. Please contact support with RequestID: {request_id}"
-            },
-        )
-
     @app.exception_handler(HTTPException)
     async def fastapi_exception_handler(request: Request, exc: HTTPException):
         request_id = getattr(request.state, "request_id", "unknown")
-        logger.error(
-            f"FastAPI error for RequestID: {request_id}. Exception: {exc}",
-            exc_info=True,
-        )
+        log_exception(limiter, "FastAPI error", request, exc, exc.status_code)
         return JSONResponse(
             status_code=exc.status_code,
             content={
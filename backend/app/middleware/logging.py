@@ -1,27 +1,80 @@
 import time
 import uuid
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import URL, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.logger import logger
+from app.core.tracing import tracer
+from app.db.instrumentation import track_queries
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
+class LoggingMiddleware:
+    """Tags every request with an id and logs how long it took.
+
+    ``X-Request-ID`` and ``X-Request-Time`` (seconds until the response
+    headers were sent) are added to the response, along with a
+    ``Server-Timing`` entry for the SQL queries run so far. The log line
+    reports the query count and DB time of the whole request and carries
+    them, with the route and status, as structured fields. The request is
+    the root span of its trace. Plain ASGI, so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Generate uuid for each request
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
 
         # Calculate RequestTime
         start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
+        status_code = 500
 
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Request-Time"] = str(process_time)
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Request-Time"] = str(time.time() - start_time)
+                headers.append("Server-Timing", query_stats.server_timing())
+            await send(message)
 
-        logger.info(
-            f"{request.method} {request.url} completed in {process_time:.4f} sec. RequestID: {request_id}"
-        )
-        return response
+        with (
+            tracer.span(
+                "http.request",
+                **{"http.method": scope["method"], "request_id": request_id},
+            ) as span,
+            track_queries() as query_stats,
+        ):
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                process_time = time.time() - start_time
+                route = scope.get("route")
+                if span.recording:
+                    span.set_attribute("http.route", getattr(route, "path", ""))
+                    span.set_attribute("http.status_code", status_code)
+                    span.set_attribute("db.queries", query_stats.count)
+                logger.info(
+                    f"{scope['method']} {URL(scope=scope)} completed in {process_time:.4f} sec. "
+                    f"Queries: {query_stats.count} in {query_stats.duration_ms:.1f} ms. "
+                    f"RequestID: {request_id}",
+                    extra={
+                        "access_log": True,
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "route": getattr(route, "path", None),
+                        "status": status_code,
+                        "duration": process_time,
+                        "db_queries": query_stats.count,
+                        "db_time_ms": query_stats.duration_ms,
+                    },
+                )
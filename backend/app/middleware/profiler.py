@@ -0,0 +1,94 @@
+from typing import Sequence
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiler import (
+    Profiler,
+    ProfilerBusyError,
+    is_profiler_allowed,
+    profiler as default_profiler,
+)
+
+# Admin and scrape endpoints, never counted as profiled requests
+DEFAULT_EXCLUDED_PATHS = ("/system/profile", "/system/metrics")
+
+
+class ProfilerMiddleware:
+    """Feeds requests to the on-demand profiler.
+
+    While the admin endpoint profiles the next N requests, each request is
+    sampled from the moment it reaches this middleware, so the other
+    middleware is part of the profile. Paths ending in one of
+    ``excluded_paths`` are not claimed, whatever the API prefix. A request
+    with ``?profile=1`` from an allowed client is profiled on its own and
+    answered with its collapsed-stack report instead of the response body,
+    or with 409 while another profile is running.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: Profiler = default_profiler,
+        excluded_paths: Sequence[str] = DEFAULT_EXCLUDED_PATHS,
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if QueryParams(scope["query_string"]).get("profile") == "1":
+            if is_profiler_allowed(Headers(scope=scope)):
+                await self._profile_request(scope, receive, send)
+                return
+
+        if scope["path"].endswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = self.profiler.claim_request()
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+        sampler.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.finish_request(sampler)
+
+    async def _profile_request(self, scope: Scope, receive: Receive, send: Send):
+        status_code = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        try:
+            with self.profiler.profile_request() as sampler:
+                await self.app(scope, receive, discard)
+        except ProfilerBusyError as e:
+            response = JSONResponse({"detail": str(e)}, status_code=409)
+            await response(scope, receive, send)
+            return
+
+        body = sampler.collapsed().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profile-samples", str(sampler.samples).encode()),
+                    (b"x-profile-duration", f"{sampler.duration:.4f}".encode()),
+                    (b"x-profiled-status", str(status_code).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,36 +1,57 @@
 import uuid
+from http.cookies import SimpleCookie
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-class SessionMiddleware(BaseHTTPMiddleware):
+class SessionMiddleware:
+    """Assigns every request a session id.
+
+    The id is taken from the session cookie or the ``X-Session-ID`` header, or
+    generated, stored in ``request.state.session_id`` and echoed back in both.
+    Plain ASGI, so streaming responses pass through untouched.
+    """
+
     def __init__(
         self,
         app: ASGIApp,
         cookie_name: str = "session_id",
         cookie_max_age: int = 86400,  # 24 hours in seconds
     ):
-        super().__init__(app)
+        self.app = app
         self.cookie_name = cookie_name
         self.cookie_max_age = cookie_max_age
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        session_id = request.cookies.get("session_id") or request.headers.get(
-            "X-Session-ID"
-        )
+    def _set_cookie_header(self, session_id: str) -> str:
+        cookie: SimpleCookie = SimpleCookie()
+        cookie[self.cookie_name] = session_id
+        cookie[self.cookie_name]["path"] = "/"
+        cookie[self.cookie_name]["samesite"] = "lax"
+        return cookie.output(header="").strip()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        cookies = cookie_parser(headers.get("cookie", ""))
+        session_id = cookies.get(self.cookie_name) or headers.get("x-session-id")
 
         if not session_id:
             session_id = str(uuid.uuid4())
 
-        request.state.session_id = session_id
-
-        response = await call_next(request)
+        scope.setdefault("state", {})["session_id"] = session_id
 
-        response.set_cookie("session_id", session_id)
-        response.headers["X-Session-ID"] = session_id
+        async def send_with_session(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append(
+                    "set-cookie", self._set_cookie_header(session_id)
+                )
+                response_headers["X-Session-ID"] = session_id
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_session)
@@ -1,61 +1,256 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Optional
 
 from app.core.config import settings
+from app.core.exceptions import ExternalAPIClientError
 from app.core.logger import logger
+from app.core.tracing import traced
 from app.db.redis import RedisRepository
-from app.external.CBRF_client import CBRFClient, CBRFResponse
+from app.external.CBRF_client import CBRFClient, CBRFResponse, RateTable
+
+# How long stale rates are served before the upstream is tried again
+STALE_RETRY_INTERVAL = 10
+
+
+def next_publication_time(table: RateTable) -> Optional[float]:
+    """Unix time at which CBRF is expected to publish the next rates.
+
+    CBRF publishes once per business day, so the next set is due a day after
+    the ``Timestamp`` of the current one.
+    """
+    timestamp = table.timestamp
+    if not timestamp:
+        return None
+    try:
+        published_at = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return (published_at + timedelta(days=1)).timestamp()
 
 
 class CBRFService:
-    """Service for fetching and caching CBRF daily rates"""
+    """Service for fetching and caching CBRF daily rates
+
+    The full rate table is cached in two tiers: an in-process copy that turns the hot path
+    into an attribute read, and a JSON value in Redis shared by all workers.
+    Concurrent misses share a single load, so only one of them reaches Redis
+    and, if needed, the CBRF API. Once rates have been loaded, expired values
+    are served while a refresh runs in the background.
+    """
 
-    def __init__(self, redis: RedisRepository):
+    def __init__(
+        self,
+        redis: RedisRepository,
+        cache_ttl: int = settings.CBR_RATES_CACHE_TTL,
+        memory_ttl: int = settings.CBR_RATES_MEMORY_TTL,
+    ):
         self._redis = redis
-        self._cache_ttl = timedelta(hours=1)
+        self._cache_ttl = timedelta(seconds=cache_ttl)
+        self._memory_ttl = memory_ttl
+        self._table: Optional[RateTable] = None
+        self._rates_expires_at: float = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def rate_table(self) -> Optional[RateTable]:
+        """Last loaded rate table, possibly stale"""
+        return self._table
+
+    @property
+    def seconds_until_stale(self) -> float:
+        return self._rates_expires_at - time.monotonic()
+
+    @traced()
+    async def get_rate_table(self) -> RateTable:
+        """Get the rate table from cache or CBRF API
 
-    async def get_daily_rates(self) -> Dict[str, Any]:
+        Only the very first call waits for a load; afterwards stale rates are
+        returned immediately and refreshed in the background.
+
+        Returns:
+            RateTable: Rates of all currencies published by CBRF
+        """
+        if self._table is not None:
+            if self.seconds_until_stale <= 0:
+                self._start_load()
+            return self._table
+
+        # Shield the shared load from cancellation of any single waiter
+        return await asyncio.shield(self._start_load())
+
+    async def get_daily_rates(self) -> CBRFResponse:
         """Get daily rates from cache or CBRF API
 
         Returns:
-            Dictionary containing date and exchange rates
+            CBRFResponse: Date and USD rate
         """
-        # Try to get from cache first
-        cached_data = await self._get_cached_rates()
-        if cached_data is not None:
-            return cached_data
+        table = await self.get_rate_table()
+        return table.daily_rates()
+
+    async def get_usd_rate(self) -> float:
+        table = await self.get_rate_table()
+        return table.rate("USD")
+
+    async def refresh(self, from_upstream: bool = False) -> RateTable:
+        """Reload rates now, joining a load that is already in flight.
+
+        Args:
+            from_upstream: Skip Redis and fetch from the CBRF API
+        """
+        return await asyncio.shield(self._start_load(from_upstream))
+
+    def _start_load(self, from_upstream: bool = False) -> asyncio.Task:
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._load_rates(from_upstream))
+            self._inflight.add_done_callback(self._on_load_done)
+        return self._inflight
 
-        # Fetch fresh data if not in cache
-        async with CBRFClient() as client:
-            rates: CBRFResponse = await client.get_daily_rates()
+    def _on_load_done(self, task: asyncio.Task) -> None:
+        self._inflight = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error loading rates: {task.exception()}")
 
-        # Cache the fresh data
-        await self._cache_rates(rates)
+    @traced()
+    async def _load_rates(self, from_upstream: bool = False) -> RateTable:
+        """Fill the in-process cache from Redis, falling back to the CBRF API"""
+        table = None if from_upstream else await self._get_cached_rates()
+        if table is None:
+            try:
+                async with CBRFClient() as client:
+                    table = await client.get_rate_table()
+            except ExternalAPIClientError as e:
+                if self._table is None:
+                    raise
+                # Upstream is unhealthy: keep serving the last known rates
+                logger.warning(f"Serving stale rates, CBRF API unavailable: {e}")
+                self._rates_expires_at = time.monotonic() + STALE_RETRY_INTERVAL
+                return self._table
+            await self._cache_rates(table)
 
-        return rates
+        self._table = table
+        self._rates_expires_at = time.monotonic() + self._memory_ttl
+        return table
 
-    async def _get_cached_rates(self) -> Optional[Dict[str, Any]]:
+    async def _get_cached_rates(self) -> Optional[RateTable]:
         """Get rates from cache if available"""
         try:
-            data = await self._redis.get(settings.REDIS_USD_KEY)
+            data = await self._redis.get_value(
+                self._redis.value_key(settings.REDIS_DATA_KEY)
+            )
             if data:
-                return data
+                return RateTable.from_dict(data)
         except Exception as e:
             logger.error(f"Error getting rates from cache: {e}")
         return None
 
-    async def _cache_rates(self, rates: CBRFResponse) -> None:
+    async def _cache_rates(self, table: RateTable) -> None:
         """Cache rates"""
         try:
-            await self._redis.set(
-                settings.REDIS_DATA_KEY,
-                rates["Date"],
-                expire=int(self._cache_ttl.total_seconds()),
-            )
-            await self._redis.set(
-                settings.REDIS_USD_KEY,
-                str(rates["Valute"]),
+            await self._redis.set_value(
+                self._redis.value_key(settings.REDIS_DATA_KEY),
+                table.to_dict(),
                 expire=int(self._cache_ttl.total_seconds()),
             )
         except Exception as e:
             logger.error(f"Error caching rates: {e}")
+
+
+class CBRFRateRefresher:
+    """Background task that keeps CBRFService rates fresh.
+
+    Rates are reloaded ``prefetch_margin`` seconds before they go stale, and
+    straight from the CBRF API shortly after the next publication is due, so
+    requests and scheduler ticks never wait for the upstream. When the API
+    still returns the same rates (weekends, holidays, late publication), the
+    next upstream check waits another ``publication_grace`` seconds.
+    """
+
+    def __init__(
+        self,
+        service: CBRFService,
+        prefetch_margin: float = settings.CBR_RATES_PREFETCH_MARGIN,
+        publication_grace: float = settings.CBR_RATES_PUBLICATION_GRACE,
+        retry_interval: float = settings.CBR_RATES_REFRESH_RETRY,
+        min_interval: float = 1.0,
+    ):
+        self.service = service
+        self.prefetch_margin = prefetch_margin
+        self.publication_grace = publication_grace
+        self.retry_interval = retry_interval
+        self.min_interval = min_interval
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._last_refresh_failed = False
+        # Timestamp the upstream kept returning, and when to ask again
+        self._unchanged_timestamp: Optional[str] = None
+        self._unchanged_until = 0.0
+
+    def _publication_due_at(self) -> Optional[float]:
+        table = self.service.rate_table
+        if table is None:
+            return None
+        published_at = next_publication_time(table)
+        if published_at is None:
+            return None
+        due_at = published_at + self.publication_grace
+        if table.timestamp == self._unchanged_timestamp:
+            due_at = max(due_at, self._unchanged_until)
+        return due_at
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next refresh."""
+        if self._last_refresh_failed or self.service.rate_table is None:
+            return self.retry_interval
+
+        delay = self.service.seconds_until_stale - self.prefetch_margin
+        due_at = self._publication_due_at()
+        if due_at is not None and due_at > time.time():
+            delay = min(delay, due_at - time.time())
+        return max(delay, self.min_interval)
+
+    async def refresh(self) -> None:
+        due_at = self._publication_due_at()
+        from_upstream = due_at is not None and time.time() >= due_at
+        previous = self.service.rate_table
+        try:
+            table = await self.service.refresh(from_upstream=from_upstream)
+            self._last_refresh_failed = False
+        except Exception as e:
+            self._last_refresh_failed = True
+            logger.error(f"Error refreshing CBRF rates: {str(e)}")
+            return
+
+        if from_upstream and previous is not None:
+            if table.timestamp == previous.timestamp:
+                # Nothing published yet: back off instead of asking every tick
+                self._unchanged_timestamp = table.timestamp
+                self._unchanged_until = time.time() + self.publication_grace
+
+    async def start(self) -> None:
+        """Load rates and start refreshing them in the background."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        await self.refresh()
+
+        async def run_refresher():
+            while self.is_running:
+                await asyncio.sleep(self.next_delay())
+                await self.refresh()
+
+        self.task = asyncio.create_task(run_refresher())
+        logger.info("CBRF rate refresher started")
+
+    async def stop(self) -> None:
+        """Stop the refresher."""
+        if self.is_running and self.task:
+            self.is_running = False
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            logger.info("CBRF rate refresher stopped")
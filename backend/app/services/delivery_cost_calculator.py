@@ -1,32 +1,61 @@
 from datetime import datetime
-from typing import List
+from typing import List, Protocol, Sequence
 
+from app.core.constants import CONTENT_COST_RATE, WEIGHT_RATE
 from app.core.logger import logger
 from app.db.models.package import Package
-from app.external.CBRF_client import CBRFClient
+from app.external.CBRF_client import CBRFResponse
+
+
+class RatesSource(Protocol):
+    """Anything that returns CBRF daily rates: CBRFClient or CBRFService."""
+
+    async def get_daily_rates(self) -> CBRFResponse: ...
 
 
 class DeliveryCostCalculator:
-    def __init__(self, cbrf_client: CBRFClient):
+    def __init__(self, cbrf_client: RatesSource):
         self.cbrf_client = cbrf_client
 
+    async def get_usd_rate(self) -> float:
+        """Fetch the current USD rate in rubles."""
+        rates = await self.cbrf_client.get_daily_rates()
+        return rates["Valute"]
+
+    @staticmethod
+    def compute_delivery_costs(
+        weights: Sequence[float], content_costs: Sequence[float], usd_rate: float
+    ) -> List[float]:
+        """Calculate delivery costs in rubles for a batch at a known rate."""
+        return [
+            round(
+                (weight * WEIGHT_RATE + content_cost * CONTENT_COST_RATE) * usd_rate, 2
+            )
+            for weight, content_cost in zip(weights, content_costs)
+        ]
+
+    async def calculate_delivery_costs(
+        self, weights: Sequence[float], content_costs: Sequence[float]
+    ) -> List[float]:
+        """Calculate delivery costs in rubles, fetching the rate once per batch."""
+        usd_rate = await self.get_usd_rate()
+        return self.compute_delivery_costs(weights, content_costs, usd_rate)
+
     async def calculate_delivery_cost(
         self, weight: float, content_cost: float
     ) -> float:
         """Calculate delivery cost in rubles."""
-        rates = await self.cbrf_client.get_daily_rates()
-        usd_rate = rates["Valute"]
-
-        delivery_cost = (weight * 0.5 + content_cost * 0.01) * usd_rate
-        return round(delivery_cost, 2)
+        (delivery_cost,) = await self.calculate_delivery_costs([weight], [content_cost])
+        return delivery_cost
 
     async def process_unprocessed_packages(self, packages: List[Package]) -> None:
         """Process packages without delivery cost."""
         try:
-            for package in packages:
-                delivery_cost = await self.calculate_delivery_cost(
-                    weight=package.weight, content_cost=package.content_cost
-                )
+            delivery_costs = await self.calculate_delivery_costs(
+                [package.weight for package in packages],
+                [package.content_cost for package in packages],
+            )
+            for package, delivery_cost in zip(packages, delivery_costs):
                 package.delivery_cost = delivery_cost
 
             logger.info(f"Processed {len(packages)} packages with delivery costs")
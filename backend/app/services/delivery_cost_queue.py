@@ -0,0 +1,113 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logger import logger
+from app.db.repositories.package_repository import PackageRepository
+from app.services.cbrf import CBRFService
+from app.services.package_cache import PackageCache
+
+
+class DeliveryCostQueue:
+    """In-process work queue that prices packages right after they are written.
+
+    Package ids are pushed by PackageService and picked up by a small pool of
+    asyncio workers. Each worker collects ids for ``batch_window`` seconds and
+    prices the micro-batch with one UPDATE using the rate cached by
+    CBRFService. Packages that fail to price here keep
+    ``delivery_cost IS NULL`` and are picked up by the periodic
+    DeliveryCostScheduler sweep. Priced packages are dropped from the
+    PackageCache.
+    """
+
+    def __init__(
+        self,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        cbrf_service: CBRFService,
+        workers: int = 2,
+        batch_size: int = 500,
+        batch_window: float = 0.01,
+        package_cache: Optional[PackageCache] = None,
+    ):
+        self.async_session_maker = async_session_maker
+        self.cbrf_service = cbrf_service
+        self.package_cache = package_cache
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue: asyncio.Queue[Tuple[int, str]] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    def enqueue(self, package_id: int, user_session: str) -> None:
+        self._queue.put_nowait((package_id, user_session))
+
+    def enqueue_many(self, package_ids: Iterable[int], user_session: str) -> None:
+        for package_id in package_ids:
+            self._queue.put_nowait((package_id, user_session))
+
+    async def join(self) -> None:
+        """Wait until every enqueued package has been processed."""
+        await self._queue.join()
+
+    async def process_batch(self, packages: List[Tuple[int, str]]) -> int:
+        """Price a batch of packages.
+
+        Args:
+            packages: ``(id, user_session)`` pairs
+
+        Returns:
+            int: Number of packages priced
+        """
+        usd_rate = await self.cbrf_service.get_usd_rate()
+        async with self.async_session_maker() as session:
+            package_repository = PackageRepository(session)
+            processed = await package_repository.price_packages(
+                [package_id for package_id, _ in packages], usd_rate
+            )
+        if processed and self.package_cache is not None:
+            await self.package_cache.invalidate_many(packages)
+        return processed
+
+    async def _next_batch(self) -> List[Tuple[int, str]]:
+        batch = [await self._queue.get()]
+        if self.batch_window:
+            await asyncio.sleep(self.batch_window)
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                processed = await self.process_batch(batch)
+                logger.debug(f"Priced {processed} of {len(batch)} queued packages")
+            except Exception as e:
+                logger.error(f"Error pricing queued packages: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        if self.is_running:
+            return
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info("Delivery cost queue started")
+
+    async def stop(self) -> None:
+        """Stop the worker pool."""
+        if not self.is_running:
+            return
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Delivery cost queue stopped")
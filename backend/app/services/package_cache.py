@@ -0,0 +1,149 @@
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+from app.api.v1.schemas.package import PackageOut
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.redis import RedisRepository
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class PackageCache:
+    """Redis read-through cache for package reads.
+
+    A package is stored under ``packages:{codec}:{session}:{id}``, where
+    ``codec`` is the RedisRepository codec name, so entries written with
+    another codec are never read. List and page responses of a session are
+    fields of one hash, ``packages:{codec}:{session}:lists``, so a write drops
+    every cached list of that session with a single DEL. Values are the RUB
+    representation; currency conversion happens after the cache. Redis errors
+    are logged and the read falls through to MySQL.
+
+    Invalidation also bumps the session's generation,
+    ``packages:{codec}:{session}:gen``. A miss reads the generation before
+    loading from MySQL and writes the result back only if it is unchanged, so
+    a row read before a concurrent write is never cached after that write's
+    invalidation.
+    """
+
+    def __init__(self, redis: RedisRepository, ttl: int = settings.CACHE_TTL):
+        self._redis = redis
+        self._prefix = redis.value_key("packages")
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _item_key(self, user_session: str, package_id: int) -> str:
+        return f"{self._prefix}:{user_session}:{package_id}"
+
+    def _lists_key(self, user_session: str) -> str:
+        return f"{self._prefix}:{user_session}:lists"
+
+    def _generation_key(self, user_session: str) -> str:
+        return f"{self._prefix}:{user_session}:gen"
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    async def get_package(
+        self,
+        user_session: str,
+        package_id: int,
+        loader: Callable[[], Awaitable[Optional[PackageOut]]],
+    ) -> Optional[PackageOut]:
+        key = self._item_key(user_session, package_id)
+        try:
+            cached = await self._redis.get_value(key)
+        except Exception as e:
+            logger.error(f"Error reading package cache: {e}")
+            return await loader()
+        if cached is not None:
+            self.hits += 1
+            return PackageOut.model_validate(cached)
+
+        self.misses += 1
+        generation_key = self._generation_key(user_session)
+        try:
+            generation = await self._redis.get(generation_key)
+        except Exception as e:
+            logger.error(f"Error reading package cache: {e}")
+            return await loader()
+        package = await loader()
+        if package is not None:
+            try:
+                await self._redis.set_value_if(
+                    key, package, generation_key, generation, expire=self.ttl
+                )
+            except Exception as e:
+                logger.error(f"Error writing package cache: {e}")
+        return package
+
+    async def get_list(
+        self,
+        user_session: str,
+        field: str,
+        model: type[T],
+        loader: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Read one cached list response of a session, e.g. ``list:0:100``"""
+        key = self._lists_key(user_session)
+        try:
+            cached = await self._redis.hget_value(key, field)
+        except Exception as e:
+            logger.error(f"Error reading package cache: {e}")
+            return await loader()
+        if cached is not None:
+            self.hits += 1
+            return model.model_validate(cached)
+
+        self.misses += 1
+        generation_key = self._generation_key(user_session)
+        try:
+            generation = await self._redis.get(generation_key)
+        except Exception as e:
+            logger.error(f"Error reading package cache: {e}")
+            return await loader()
+        value = await loader()
+        try:
+            await self._redis.hset_value_if(
+                key, field, value, generation_key, generation, expire=self.ttl
+            )
+        except Exception as e:
+            logger.error(f"Error writing package cache: {e}")
+        return value
+
+    async def invalidate(self, user_session: str, package_ids: Iterable[int]) -> None:
+        await self.invalidate_many((id, user_session) for id in package_ids)
+
+    async def invalidate_many(self, packages: Iterable[Tuple[int, str]]) -> None:
+        """Drop cached packages and all cached lists of their sessions.
+
+        Args:
+            packages: ``(id, user_session)`` pairs of the changed packages
+        """
+        keys = set()
+        sessions = set()
+        for package_id, user_session in packages:
+            sessions.add(user_session)
+            keys.add(self._lists_key(user_session))
+            keys.add(self._item_key(user_session, package_id))
+        if not keys:
+            return
+        try:
+            async with self._redis.pipeline() as pipe:
+                pipe.delete(*keys)
+                for user_session in sessions:
+                    generation_key = self._generation_key(user_session)
+                    pipe.incr(generation_key)
+                    # Outlives the entries written under the old generation
+                    pipe.expire(generation_key, 2 * self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error invalidating package cache: {e}")
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.schemas.package import ExportFormat
+from app.db.repositories.package_repository import PackageRepository
+
+EXPORT_COLUMNS = ("id", "name", "weight", "type_id", "content_cost", "delivery_cost")
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _render_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _render_csv(rows: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_packages(
+    session_maker: async_sessionmaker[AsyncSession],
+    user_session: str,
+    export_format: ExportFormat,
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """Yield a session's packages as NDJSON lines or CSV rows, batch by batch.
+
+    The generator owns its database session: a StreamingResponse keeps pulling
+    from it after request-scoped dependencies have already been torn down.
+    """
+    if export_format is ExportFormat.csv:
+        render = _render_csv
+        yield _render_csv([EXPORT_COLUMNS])
+    else:
+        render = _render_ndjson
+
+    async with session_maker() as session:
+        repository = PackageRepository(session)
+        async for rows in repository.stream_rows(
+            user_session, EXPORT_COLUMNS, batch_size=batch_size
+        ):
+            yield render(rows)
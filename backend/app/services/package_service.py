@@ -1,28 +1,168 @@
+from typing import Iterable, List, Optional
+
+from pydantic import RootModel
+
 from app.api.v1.schemas.package import (
+    PackageBase,
     PackageCreate,
+    PackageOut,
+    PackagePage,
     PackageUpdate,
 )
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.tracing import traced
 from app.db.repositories.package_repository import PackageRepository
+from app.external.CBRF_client import BASE_CURRENCY
+from app.services.cbrf import CBRFService
+from app.services.delivery_cost_queue import DeliveryCostQueue
+from app.services.package_cache import PackageCache
+
+PackageList = RootModel[List[PackageOut]]
 
 
 class PackageService:
-    def __init__(self, repository: PackageRepository):
+    def __init__(
+        self,
+        repository: PackageRepository,
+        delivery_cost_queue: Optional[DeliveryCostQueue] = None,
+        cbrf_service: Optional[CBRFService] = None,
+        cache: Optional[PackageCache] = None,
+    ):
         self.repository = repository
+        self.delivery_cost_queue = delivery_cost_queue
+        self.cbrf_service = cbrf_service
+        self.cache = cache
+
+    async def to_currency(
+        self, packages: Iterable[PackageOut], currency: str = BASE_CURRENCY
+    ) -> List[PackageOut]:
+        """Return packages with delivery_cost in ``currency``.
+
+        Packages in the base currency are returned as they are. Otherwise the
+        rate is looked up once in the cached rate table, so converting a page
+        costs no upstream calls, and converted copies are returned.
+
+        Raises:
+            ValueError: If the currency is unknown or rates are unavailable
+        """
+        currency = currency.upper()
+        if currency == BASE_CURRENCY:
+            return list(packages)
+        if self.cbrf_service is None:
+            raise ValueError("Currency conversion is not available")
+
+        table = await self.cbrf_service.get_rate_table()
+        rate = table.rate(currency)
+        return [
+            package.model_copy(
+                update={
+                    "delivery_cost": (
+                        round(package.delivery_cost / rate, 2)
+                        if package.delivery_cost is not None
+                        else None
+                    ),
+                    "currency": currency,
+                }
+            )
+            for package in packages
+        ]
 
-    async def get_packages(self, user_session: str, skip: int = 0, limit: int = 100):
-        return await self.repository.list(
-            skip=skip, limit=limit, user_session=user_session
-        )
+    @traced()
+    async def get_packages(
+        self,
+        user_session: str,
+        skip: int = 0,
+        limit: int = 100,
+        currency: str = BASE_CURRENCY,
+    ) -> List[PackageOut]:
+        async def load() -> PackageList:
+            packages = await self.repository.list(
+                skip=skip, limit=limit, user_session=user_session
+            )
+            return PackageList(packages)
 
-    async def get_package_by_id(self, package_id: int, user_session: str):
-        return await self.repository.get(package_id, user_session)
+        if self.cache is not None:
+            packages = await self.cache.get_list(
+                user_session, f"list:{skip}:{limit}", PackageList, load
+            )
+        else:
+            packages = await load()
+        return await self.to_currency(packages.root, currency)
 
+    @traced()
+    async def get_packages_page(
+        self,
+        user_session: str,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        currency: str = BASE_CURRENCY,
+    ) -> PackagePage:
+        """Return one keyset page and the cursor for the next one.
+
+        Raises:
+            ValueError: If the cursor is malformed or the currency is unknown
+        """
+        after_id = decode_cursor(cursor) if cursor else None
+
+        async def load() -> PackagePage:
+            # Fetch one extra row to find out whether another page exists
+            packages = await self.repository.list_after(
+                user_session, after_id=after_id, limit=limit + 1
+            )
+            items = packages[:limit]
+            next_cursor = encode_cursor(items[-1].id) if len(packages) > limit else None
+            return PackagePage(items=items, next_cursor=next_cursor)
+
+        if self.cache is not None:
+            page = await self.cache.get_list(
+                user_session, f"page:{after_id}:{limit}", PackagePage, load
+            )
+        else:
+            page = await load()
+        page.items = await self.to_currency(page.items, currency)
+        return page
+
+    @traced()
+    async def get_package_by_id(
+        self, package_id: int, user_session: str, currency: str = BASE_CURRENCY
+    ) -> Optional[PackageOut]:
+        if self.cache is not None:
+            package = await self.cache.get_package(
+                user_session,
+                package_id,
+                lambda: self.repository.get(package_id, user_session),
+            )
+        else:
+            package = await self.repository.get(package_id, user_session)
+        if not package:
+            return None
+        [package_out] = await self.to_currency([package], currency)
+        return package_out
+
+    @traced()
     async def create_package(self, package: PackageCreate, user_session: str):
         package_dict = package.model_dump()
         package_dict["user_session"] = user_session
         modified_package = PackageCreate(**package_dict)
-        return await self.repository.create(modified_package)
+        new_package = await self.repository.create(modified_package)
+        if self.cache is not None:
+            await self.cache.invalidate(user_session, [new_package.id])
+        if self.delivery_cost_queue is not None:
+            self.delivery_cost_queue.enqueue(new_package.id, user_session)
+        return new_package
+
+    @traced()
+    async def create_packages(
+        self, packages: List[PackageBase], user_session: str
+    ) -> List[int]:
+        ids = await self.repository.bulk_create(packages, user_session)
+        if self.cache is not None:
+            await self.cache.invalidate(user_session, ids)
+        if self.delivery_cost_queue is not None:
+            self.delivery_cost_queue.enqueue_many(ids, user_session)
+        return ids
 
+    @traced()
     async def update_package(
         self, package_id: int, package_update: PackageUpdate, user_session: str
     ):
@@ -30,11 +170,25 @@ class PackageService:
         existing_package = await self.repository.get(package_id, user_session)
         if not existing_package:
             return None
-        return await self.repository.update(package_id, package_update)
+        updated_package = await self.repository.update(package_id, package_update)
+        if self.cache is not None:
+            await self.cache.invalidate(user_session, [package_id])
+        # The repository clears delivery_cost when weight or content_cost changed
+        if (
+            updated_package is not None
+            and package_update.delivery_cost is None
+            and self.delivery_cost_queue is not None
+        ):
+            self.delivery_cost_queue.enqueue(package_id, user_session)
+        return updated_package
 
+    @traced()
     async def delete_package(self, package_id: int, user_session: str):
         # First verify the package belongs to the user_session
         existing_package = await self.repository.get(package_id, user_session)
         if not existing_package:
             return None
-        return await self.repository.delete(package_id)
+        deleted = await self.repository.delete(package_id)
+        if self.cache is not None:
+            await self.cache.invalidate(user_session, [package_id])
+        return deleted
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.redis import RedisRepository
+from app.db.repositories.user_session_repository import UserSessionRepository
+
+# Flush last_activity in UPDATE statements of at most this many sessions
+ACTIVITY_FLUSH_CHUNK = 1000
+
+
+class SessionValidator:
+    """Validates user sessions without touching the database on the hot path.
+
+    Known session ids are remembered in an in-process LRU and in Redis, so only
+    the first request of a session reaches MySQL. ``last_activity`` is recorded
+    in memory and written by a background flusher every ``flush_interval``
+    seconds as one bulk UPDATE.
+    """
+
+    def __init__(
+        self,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        redis: Optional[RedisRepository] = None,
+        cache_ttl: int = settings.SESSION_CACHE_TTL,
+        memory_ttl: int = settings.SESSION_MEMORY_TTL,
+        max_size: int = settings.SESSION_CACHE_SIZE,
+        flush_interval: float = settings.SESSION_ACTIVITY_FLUSH_INTERVAL,
+    ):
+        self.async_session_maker = async_session_maker
+        self._redis = redis
+        self.cache_ttl = cache_ttl
+        self.memory_ttl = memory_ttl
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._known: OrderedDict[str, float] = OrderedDict()
+        self._activity: Dict[str, datetime] = {}
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _redis_key(session_id: str) -> str:
+        return f"sessions:known:{session_id}"
+
+    def _remember(self, session_id: str) -> None:
+        self._known[session_id] = time.monotonic() + self.memory_ttl
+        self._known.move_to_end(session_id)
+        while len(self._known) > self.max_size:
+            self._known.popitem(last=False)
+
+    def _is_known_locally(self, session_id: str) -> bool:
+        expires_at = self._known.get(session_id)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._known[session_id]
+            return False
+        self._known.move_to_end(session_id)
+        return True
+
+    async def _is_known_in_redis(self, session_id: str) -> bool:
+        if self._redis is None:
+            return False
+        try:
+            return await self._redis.get(self._redis_key(session_id)) is not None
+        except Exception as e:
+            logger.error(f"Error reading session cache: {e}")
+            return False
+
+    async def _mark_known_in_redis(self, session_id: str) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                self._redis_key(session_id), "1", expire=self.cache_ttl
+            )
+        except Exception as e:
+            logger.error(f"Error writing session cache: {e}")
+
+    async def validate(self, session_id: str, db: AsyncSession) -> str:
+        """Make sure the session exists and record activity.
+
+        Args:
+            session_id: Session id from the cookie or header
+            db: Request database session, used only for unknown sessions
+        """
+        if not self._is_known_locally(session_id):
+            if not await self._is_known_in_redis(session_id):
+                await self._ensure_exists(session_id, db)
+                await self._mark_known_in_redis(session_id)
+            self._remember(session_id)
+        self.touch(session_id)
+        return session_id
+
+    async def _ensure_exists(self, session_id: str, db: AsyncSession) -> None:
+        session_repo = UserSessionRepository(db)
+        if await session_repo.get_by_id(session_id):
+            return
+        try:
+            await session_repo.create(session_id)
+        except IntegrityError:
+            # Created by a concurrent request
+            await db.rollback()
+
+    def touch(self, session_id: str) -> None:
+        self._activity[session_id] = datetime.now(timezone.utc)
+
+    async def forget(self, session_ids: Iterable[str]) -> None:
+        """Drop sessions from the caches, e.g. after they were deleted."""
+        session_ids = list(session_ids)
+        for session_id in session_ids:
+            self._known.pop(session_id, None)
+            self._activity.pop(session_id, None)
+        if self._redis is None or not session_ids:
+            return
+        try:
+            await self._redis.delete(*map(self._redis_key, session_ids))
+        except Exception as e:
+            logger.error(f"Error invalidating session cache: {e}")
+
+    async def flush(self) -> int:
+        """Write accumulated last_activity values.
+
+        Returns:
+            int: Number of sessions updated
+        """
+        if not self._activity:
+            return 0
+        activity, self._activity = self._activity, {}
+        items = list(activity.items())
+
+        updated = 0
+        try:
+            async with self.async_session_maker() as session:
+                session_repo = UserSessionRepository(session)
+                for start in range(0, len(items), ACTIVITY_FLUSH_CHUNK):
+                    chunk = dict(items[start : start + ACTIVITY_FLUSH_CHUNK])
+                    updated += await session_repo.bulk_update_last_activity(chunk)
+        except Exception as e:
+            # Keep the values for the next flush unless newer ones arrived
+            for session_id, last_activity in activity.items():
+                self._activity.setdefault(session_id, last_activity)
+            logger.error(f"Error flushing session activity: {str(e)}")
+        return updated
+
+    async def start(self) -> None:
+        """Start the last_activity flusher."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+
+        async def run_flusher():
+            while self.is_running:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+
+        self.task = asyncio.create_task(run_flusher())
+        logger.info("Session activity flusher started")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write what is left."""
+        if self.is_running and self.task:
+            self.is_running = False
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            await self.flush()
+            logger.info("Session activity flusher stopped")
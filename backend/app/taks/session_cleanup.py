@@ -1,21 +1,168 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional, Sequence, Tuple
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db import get_db
-from app.models import UserSession
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.repositories.package_repository import PackageRepository
+from app.db.repositories.user_session_repository import UserSessionRepository
+from app.services.package_cache import PackageCache
+from app.services.session_validator import SessionValidator
 
 
-def cleanup_inactive_sessions():
-    db = next(get_db())
-    try:
-        cutoff = datetime.utcnow() - timedelta(days=30)
-        db.query(UserSession).filter(UserSession.last_activity < cutoff).delete()
-        db.commit()
-    finally:
-        db.close()
+class CleanupResult(NamedTuple):
+    sessions: int = 0
+    packages: int = 0
+    orphaned_packages: int = 0
 
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(cleanup_inactive_sessions, "interval", hours=24)
-scheduler.start()
+class SessionCleanupJob:
+    """Periodically deletes expired sessions, their packages and orphans.
+
+    Every statement touches at most ``batch_size`` rows and commits on its
+    own, with a ``batch_pause`` sleep between batches, so the job never holds
+    locks for long or starves API traffic.
+    """
+
+    def __init__(
+        self,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        lifetime_seconds: int = settings.SESSION_LIFETIME,
+        interval_seconds: int = settings.SESSION_CLEANUP_INTERVAL,
+        batch_size: int = settings.SESSION_CLEANUP_BATCH_SIZE,
+        batch_pause: float = settings.SESSION_CLEANUP_BATCH_PAUSE,
+        session_validator: Optional[SessionValidator] = None,
+        package_cache: Optional[PackageCache] = None,
+    ):
+        self.async_session_maker = async_session_maker
+        self.lifetime = timedelta(seconds=lifetime_seconds)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.session_validator = session_validator
+        self.package_cache = package_cache
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def _pause(self) -> None:
+        if self.batch_pause:
+            await asyncio.sleep(self.batch_pause)
+
+    async def _delete_packages(
+        self,
+        package_repository: PackageRepository,
+        packages: Sequence[Tuple[int, Optional[str]]],
+        expired_before: Optional[datetime] = None,
+    ) -> int:
+        deleted = await package_repository.delete_many(
+            [id for id, _ in packages], expired_before
+        )
+        if self.package_cache is not None:
+            await self.package_cache.invalidate_many(
+                (id, user_session) for id, user_session in packages if user_session
+            )
+        return deleted
+
+    async def delete_expired_sessions(self) -> CleanupResult:
+        """Delete sessions inactive for longer than the session lifetime."""
+        if self.session_validator is not None:
+            # Recent activity may still be waiting in memory
+            await self.session_validator.flush()
+        cutoff = datetime.now(timezone.utc) - self.lifetime
+
+        sessions = packages = 0
+        after_id: Optional[str] = None
+        async with self.async_session_maker() as session:
+            session_repo = UserSessionRepository(session)
+            package_repository = PackageRepository(session)
+            while True:
+                session_ids = await session_repo.list_expired_ids(
+                    cutoff, after_id, self.batch_size
+                )
+                if not session_ids:
+                    break
+                after_id = session_ids[-1]
+
+                while True:
+                    # Sessions active again since the listing keep their packages
+                    session_packages = (
+                        await package_repository.list_session_package_ids(
+                            session_ids, self.batch_size, cutoff
+                        )
+                    )
+                    if not session_packages:
+                        break
+                    packages += await self._delete_packages(
+                        package_repository, session_packages, cutoff
+                    )
+                    await self._pause()
+
+                deleted = await session_repo.delete_expired(session_ids, cutoff)
+                sessions += len(deleted)
+                if self.session_validator is not None:
+                    await self.session_validator.forget(deleted)
+                await self._pause()
+
+        return CleanupResult(sessions=sessions, packages=packages)
+
+    async def delete_orphaned_packages(self) -> int:
+        """Delete packages whose session no longer exists."""
+        deleted = 0
+        after_id = 0
+        async with self.async_session_maker() as session:
+            package_repository = PackageRepository(session)
+            while True:
+                orphans = await package_repository.list_orphaned(
+                    after_id, self.batch_size
+                )
+                if not orphans:
+                    break
+                after_id = orphans[-1][0]
+                deleted += await self._delete_packages(package_repository, orphans)
+                await self._pause()
+        return deleted
+
+    async def run_once(self) -> CleanupResult:
+        """Run one cleanup pass and report the rows removed."""
+        try:
+            result = await self.delete_expired_sessions()
+            orphaned = await self.delete_orphaned_packages()
+            result = result._replace(orphaned_packages=orphaned)
+        except Exception as e:
+            logger.error(f"Error in session cleanup: {str(e)}")
+            return CleanupResult()
+
+        logger.info(
+            f"Session cleanup removed {result.sessions} sessions, "
+            f"{result.packages} packages and "
+            f"{result.orphaned_packages} orphaned packages"
+        )
+        return result
+
+    async def start(self) -> None:
+        """Start the cleanup job."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+
+        async def run_cleanup():
+            while self.is_running:
+                await self.run_once()
+                await asyncio.sleep(self.interval_seconds)
+
+        self.task = asyncio.create_task(run_cleanup())
+        logger.info("Session cleanup job started")
+
+    async def stop(self) -> None:
+        """Stop the cleanup job."""
+        if self.is_running and self.task:
+            self.is_running = False
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            logger.info("Session cleanup job stopped")
@@ -0,0 +1,113 @@
+"""Compare Redis value codecs against plain JSON strings.
+
+Measures encode/decode time and payload size for the values the app caches:
+a single package, a page of packages and the CBRF rate table. With
+``--redis-url`` the payloads are also written to Redis and ``MEMORY USAGE``
+is reported for each key.
+
+Usage (from backend/):
+    python -m benchmarks.bench_codecs
+    python -m benchmarks.bench_codecs --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.api.v1.schemas.package import PackageOut
+from app.db.codecs import CODECS, get_codec
+from app.external.CBRF_client import RateTable
+
+
+def make_payloads() -> Dict[str, Any]:
+    packages = [
+        PackageOut(
+            id=i,
+            name=f"Package {i}",
+            weight=1.5 + i % 7,
+            type_id=1 + i % 3,
+            content_cost=100.0 + i,
+            delivery_cost=round(92.5 * (0.75 + i * 0.01), 2),
+        )
+        for i in range(1, 101)
+    ]
+    valute = {
+        f"C{i:02d}": {"Nominal": 1 if i % 4 else 100, "Value": 10.0 + i * 1.37}
+        for i in range(43)
+    }
+    return {
+        "package": packages[0],
+        "page_100": packages,
+        "rate_table": RateTable.from_valute("2024-02-20T11:30:00+03:00", valute),
+    }
+
+
+def plain_json(value: Any) -> bytes:
+    """What the app stored before codecs: a JSON string per value."""
+    if isinstance(value, list):
+        return json.dumps([item.model_dump(mode="json") for item in value]).encode()
+    if isinstance(value, PackageOut):
+        return value.model_dump_json().encode()
+    return json.dumps(value.to_dict()).encode()
+
+
+def make_codecs(threshold: int) -> List[Tuple[str, Callable, Callable]]:
+    codecs = [("json-string", plain_json, json.loads)]
+    for name in sorted(CODECS):
+        for compress in (0, threshold):
+            codec = get_codec(name, compress)
+            codecs.append((codec.name, codec.encode, codec.decode))
+    return codecs
+
+
+def measure(encode: Callable, decode: Callable, value: Any, number: int):
+    data = encode(value)
+    encode_us = timeit.timeit(lambda: encode(value), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: decode(data), number=number) / number * 1e6
+    return data, encode_us, decode_us
+
+
+def redis_memory(redis_url: str, key: str, data: bytes) -> int:
+    import redis
+
+    client = redis.Redis.from_url(redis_url)
+    try:
+        client.set(key, data)
+        return client.memory_usage(key) or 0
+    finally:
+        client.delete(key)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    missing = {"orjson", "msgpack"} - set(CODECS)
+    if missing:
+        print(f"not installed, skipped: {', '.join(sorted(missing))}\n")
+
+    header = f"{'payload':<12}{'codec':<16}{'bytes':>8}{'enc us':>10}{'dec us':>10}"
+    if args.redis_url:
+        header += f"{'redis B':>10}"
+    print(header)
+    for payload_name, value in make_payloads().items():
+        for codec_name, encode, decode in make_codecs(args.threshold):
+            data, encode_us, decode_us = measure(encode, decode, value, args.number)
+            row = (
+                f"{payload_name:<12}{codec_name:<16}{len(data):>8}"
+                f"{encode_us:>10.1f}{decode_us:>10.1f}"
+            )
+            if args.redis_url:
+                key = f"bench:codecs:{payload_name}:{codec_name}"
+                row += f"{redis_memory(args.redis_url, key, data):>10}"
+            print(row)
+        print()
+
+
+if __name__ == "__main__":
+    main()
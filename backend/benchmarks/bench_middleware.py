@@ -0,0 +1,127 @@
+"""Per-request overhead of the session and logging middleware.
+
+Sends the same requests through three app variants, each in-process over
+httpx's ASGI transport with many requests in flight:
+
+* ``none``: no middleware, the baseline
+* ``base_http``: the previous BaseHTTPMiddleware implementations
+* ``asgi``: the current pure-ASGI middleware
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware --requests 5000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable, Dict
+
+from fastapi import FastAPI, Request, Response
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from app.core.logger import logger
+from app.middleware.logging import LoggingMiddleware
+from app.middleware.session import SessionMiddleware
+
+
+class BaseHTTPSessionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        session_id = request.cookies.get("session_id") or request.headers.get(
+            "X-Session-ID"
+        )
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        request.state.session_id = session_id
+        response = await call_next(request)
+        response.set_cookie("session_id", session_id)
+        response.headers["X-Session-ID"] = session_id
+        return response
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Request-Time"] = str(process_time)
+        logger.info(
+            f"{request.method} {request.url} completed in {process_time:.4f} sec. RequestID: {request_id}"
+        )
+        return response
+
+
+def make_app(session_cls=None, logging_cls=None) -> FastAPI:
+    app = FastAPI()
+    if session_cls:
+        app.add_middleware(session_cls)
+    if logging_cls:
+        app.add_middleware(logging_cls)
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"session_id": getattr(request.state, "session_id", None)}
+
+    return app
+
+
+VARIANTS: Dict[str, Callable[[], FastAPI]] = {
+    "none": make_app,
+    "base_http": lambda: make_app(BaseHTTPSessionMiddleware, BaseHTTPLoggingMiddleware),
+    "asgi": lambda: make_app(SessionMiddleware, LoggingMiddleware),
+}
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    """Seconds taken to serve ``requests`` requests."""
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                response = await client.get("/ping", headers={"X-Session-ID": str(i)})
+                response.raise_for_status()
+
+        await asyncio.gather(*(one(i) for i in range(min(requests, 200))))  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # Measure the middleware, not the log handlers
+    logger.setLevel(logging.WARNING)
+
+    results = {}
+    for name, factory in VARIANTS.items():
+        app = factory()
+        best = min(
+            [
+                await run(app, args.requests, args.concurrency)
+                for _ in range(args.rounds)
+            ]
+        )
+        results[name] = best / args.requests * 1e6
+
+    baseline = results["none"]
+    print(f"{'variant':<12}{'us/request':>12}{'overhead us':>14}")
+    for name, per_request in results.items():
+        print(f"{name:<12}{per_request:>12.1f}{per_request - baseline:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import pytest
+import pytest_asyncio
+from app.api.dependencies.databas import get_async_db
+from app.db.models.package import Package
+from app.db.models.package_type import PackageType
+from app.db.models.user_session import UserSession
+from app.main import app
+from app.services.session_validator import SessionValidator
+from httpx import ASGITransport, AsyncClient
+
+from tests.utils import assert_max_queries
+
+SESSION_ID = "budget-session"
+PACKAGES_URL = "/api/v1/packages/packages"
+
+
+@pytest_asyncio.fixture
+async def client(async_session_maker):
+    async with async_session_maker() as session:
+        package_type = PackageType(name="Одежда")
+        session.add_all([UserSession(id=SESSION_ID), package_type])
+        await session.flush()
+        session.add_all(
+            Package(
+                name=f"p{i}",
+                weight=1.0,
+                content_cost=10.0,
+                type_id=package_type.id,
+                user_session=SESSION_ID,
+            )
+            for i in range(20)
+        )
+        await session.commit()
+
+    async def override_get_db():
+        async with async_session_maker() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    app.state.session_validator = SessionValidator(async_session_maker)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        headers={"X-Session-ID": SESSION_ID},
+    ) as c:
+        yield c
+    app.dependency_overrides.clear()
+    del app.state.session_validator
+
+
+@pytest.mark.asyncio
+async def test_get_package_budget(client: AsyncClient) -> None:
+    with assert_max_queries(2):
+        response = await client.get(f"{PACKAGES_URL}/1")
+    assert response.status_code == 200
+
+    # Session known: only the package itself is read
+    with assert_max_queries(1):
+        response = await client.get(f"{PACKAGES_URL}/1")
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+
+
+@pytest.mark.asyncio
+async def test_list_packages_has_no_n_plus_one(client: AsyncClient) -> None:
+    await client.get(f"{PACKAGES_URL}/1")
+
+    with assert_max_queries(1):
+        response = await client.get(PACKAGES_URL, params={"limit": 20})
+
+    assert len(response.json()) == 20
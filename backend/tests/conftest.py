@@ -44,10 +44,16 @@
 #
 import pytest
 import pytest_asyncio
+from app.db.base import Base
+from app.db.instrumentation import instrument_engine
 from app.main import app
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from .utils import ClientManagerType, client_manager
 
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
 
 @pytest_asyncio.fixture(scope="module")
 async def async_client() -> ClientManagerType:
@@ -60,6 +66,24 @@ def anyio_backend() -> str:
     return "asyncio"
 
 
+@pytest_asyncio.fixture
+async def async_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Session factory bound to a fresh in-memory SQLite database."""
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=StaticPool)
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_session(async_session_maker) -> AsyncSession:
+    async with async_session_maker() as session:
+        yield session
+        await session.rollback()
+
+
 # @pytest_asyncio.fixture(autouse=True)
 # async def clean_db():
 #     """
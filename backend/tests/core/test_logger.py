@@ -0,0 +1,110 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueListener
+
+from app.core.logger import AccessLogSampler, JsonFormatter, LogQueueHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(level=logging.INFO, msg="GET /", args=(), exc_info=None, **extra):
+    record = logging.LogRecord("app", level, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record(
+        request_id="abc",
+        route="/api/v1/packages/packages/{package_id}",
+        status=200,
+        duration=0.0123,
+        db_queries=2,
+        db_time_ms=1.5,
+    )
+
+    data = json.loads(JsonFormatter().format(record))
+
+    assert data["level"] == "INFO"
+    assert data["logger"] == "app"
+    assert data["message"] == "GET /"
+    assert data["request_id"] == "abc"
+    assert data["route"] == "/api/v1/packages/packages/{package_id}"
+    assert data["status"] == 200
+    assert data["db_queries"] == 2
+    assert data["db_time_ms"] == 1.5
+    assert "args" not in data and "exc_info" not in data
+
+
+def test_json_formatter_traceback_is_optional():
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = make_record(logging.ERROR, "failed", exc_info=sys.exc_info())
+
+    assert (
+        "RuntimeError: boom" in json.loads(JsonFormatter().format(record))["exc_info"]
+    )
+    assert "exc_info" not in json.loads(
+        JsonFormatter(include_traceback=False).format(record)
+    )
+
+
+def test_access_log_sampler():
+    sampler = AccessLogSampler(rate=0.0)
+
+    assert not sampler.filter(make_record(access_log=True, status=200))
+    assert sampler.filter(make_record(access_log=True, status=404))
+    assert sampler.filter(make_record(logging.WARNING, access_log=True, status=200))
+    # Only access log lines are sampled
+    assert sampler.filter(make_record())
+    assert AccessLogSampler(rate=1.0).filter(make_record(access_log=True, status=200))
+
+
+def test_access_log_sampler_keeps_roughly_the_rate():
+    sampler = AccessLogSampler(rate=0.25)
+
+    kept = sum(
+        sampler.filter(make_record(access_log=True, status=200)) for _ in range(4000)
+    )
+
+    assert 700 < kept < 1300
+
+
+def test_queue_handler_writes_on_listener_thread_and_keeps_exc_info():
+    log_queue = queue.SimpleQueue()
+    collector = CollectingHandler()
+    listener = QueueListener(log_queue, collector)
+    test_logger = logging.getLogger("tests.queue_logger")
+    test_logger.setLevel(logging.DEBUG)
+    test_logger.propagate = False
+    handler = LogQueueHandler(log_queue)
+    test_logger.addHandler(handler)
+    listener.start()
+    try:
+        args = {"id": 1}
+        test_logger.info("package %s", args, extra={"db_queries": 3})
+        # Arguments are rendered when logging, not when writing
+        args["id"] = 2
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            test_logger.error("failed", exc_info=True)
+    finally:
+        listener.stop()
+        test_logger.removeHandler(handler)
+
+    info, error = collector.records
+    assert info.getMessage() == "package {'id': 1}"
+    assert info.db_queries == 3
+    assert error.exc_info[0] is ValueError
+    assert "ValueError: bad" in logging.Formatter().format(error)
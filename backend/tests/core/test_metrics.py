@@ -0,0 +1,67 @@
+import pytest
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, MetricsRegistry
+from app.middleware.metrics import UNMATCHED_ROUTE, MetricsMiddleware
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+
+def test_render_exposition_format() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram(
+        "latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)
+    )
+    registry.gauge("pool_size", "Pool size", function=lambda: 5)
+
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+        "# HELP pool_size Pool size",
+        "# TYPE pool_size gauge",
+        "pool_size 5",
+    ]
+
+
+def test_label_count_is_checked() -> None:
+    counter = MetricsRegistry().counter("c", "C", ("a", "b"))
+
+    with pytest.raises(ValueError):
+        counter.inc("only-one")
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_by_route_template() -> None:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    route = "/metrics-test/{item_id}"
+    before = HTTP_REQUESTS.value("GET", route, "200")
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for item_id in range(3):
+            await client.get(f"/metrics-test/{item_id}")
+        await client.get("/metrics-test/abc")
+        await client.get("/nowhere")
+
+    assert HTTP_REQUESTS.value("GET", route, "200") == before + 3
+    assert HTTP_REQUESTS.value("GET", route, "422") >= 1
+    assert HTTP_REQUESTS.value("GET", UNMATCHED_ROUTE, "404") >= 1
+    assert HTTP_REQUEST_DURATION.count("GET", route, "200") >= 3
@@ -0,0 +1,154 @@
+import asyncio
+import sys
+import time
+
+import pytest
+from app.api.v1.endpoints.profiler import router as profiler_router
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler, collapse_stack, profiler
+from app.middleware.profiler import ProfilerMiddleware
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+
+def burn_cpu(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware)
+    app.include_router(profiler_router, prefix="/system")
+
+    @app.get("/burn")
+    async def burn():
+        return {"total": burn_cpu(0.05)}
+
+    return app
+
+
+@pytest.fixture
+def client(monkeypatch) -> AsyncClient:
+    monkeypatch.setattr(settings, "DEBUG", False)
+    monkeypatch.setattr(settings, "PROFILER_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiler, "interval", 0.001)
+    return AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test")
+
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def test_collapse_stack_is_outermost_first():
+    stack = collapse_stack(sys._getframe())
+
+    frames = stack.split(";")
+    assert frames[-1].startswith("test_collapse_stack_is_outermost_first (")
+    assert len(frames) > 1
+
+
+def test_sampler_counts_hot_function():
+    sampler = SamplingProfiler(interval=0.001).start()
+    try:
+        burn_cpu(0.1)
+    finally:
+        sampler.stop()
+
+    assert sampler.samples > 0
+    assert "burn_cpu" in sampler.collapsed()
+    for line in sampler.collapsed().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+
+def test_gated_sampler_skips_inactive_time():
+    sampler = SamplingProfiler(interval=0.001, gated=True).start()
+    try:
+        burn_cpu(0.05)
+    finally:
+        sampler.stop()
+
+    assert sampler.samples == 0
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_requires_token(client: AsyncClient, monkeypatch):
+    response = await client.post("/system/profile", params={"seconds": 0.01})
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "PROFILER_ADMIN_TOKEN", None)
+    response = await client.post(
+        "/system/profile", params={"seconds": 0.01}, headers=ADMIN
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile_time_window(client: AsyncClient):
+    response = await client.post(
+        "/system/profile", params={"seconds": 0.05}, headers=ADMIN
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_profile_next_requests(client: AsyncClient):
+    task = asyncio.create_task(
+        client.post(
+            "/system/profile", params={"requests": 2, "seconds": 5}, headers=ADMIN
+        )
+    )
+    while not profiler.busy:
+        await asyncio.sleep(0.001)
+
+    # A second profile is refused while one is running
+    busy = await client.post("/system/profile", params={"requests": 1}, headers=ADMIN)
+    assert busy.status_code == 409
+
+    # Neither the refused call nor the first /burn used up the profile
+    assert (await client.get("/burn")).status_code == 200
+    await asyncio.sleep(0.01)
+    assert not task.done()
+
+    assert (await client.get("/burn")).status_code == 200
+    response = await task
+
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Requests"] == "2"
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert "burn_cpu" in response.text
+    assert not profiler.busy
+
+
+@pytest.mark.asyncio
+async def test_profile_single_request(client: AsyncClient):
+    response = await client.get("/burn", params={"profile": 1}, headers=ADMIN)
+
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "burn_cpu" in response.text
+    assert "total" not in response.text
+
+    # Without the token the parameter is ignored
+    response = await client.get("/burn", params={"profile": 1})
+    assert response.json()["total"] > 0
+
+
+@pytest.mark.asyncio
+async def test_profile_single_request_while_busy(client: AsyncClient):
+    task = asyncio.create_task(
+        client.post("/system/profile", params={"seconds": 0.2}, headers=ADMIN)
+    )
+    while not profiler.busy:
+        await asyncio.sleep(0.001)
+
+    response = await client.get("/burn", params={"profile": 1}, headers=ADMIN)
+
+    assert response.status_code == 409
+    assert (await task).status_code == 200
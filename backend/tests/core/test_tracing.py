@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from app.api.v1.schemas.package import PackageCreate
+from app.core.tracing import (
+    NOOP_SPAN,
+    InMemoryExporter,
+    JsonLinesExporter,
+    Tracer,
+    current_span,
+    traced,
+    tracer,
+)
+from app.db.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    tracer.configure(exporter)
+    yield exporter
+    tracer.configure(None, enabled=False)
+
+
+def test_disabled_tracer_is_noop():
+    disabled = Tracer()
+
+    with disabled.span("request") as span:
+        assert span is NOOP_SPAN
+        span.set_attribute("ignored", 1)
+    assert disabled.start_span("query") is NOOP_SPAN
+
+
+def test_spans_nest_and_export_with_root(exporter: InMemoryExporter):
+    with tracer.span("request", route="/packages") as root:
+        assert current_span() is root
+        with tracer.span("service") as service:
+            with tracer.span("query"):
+                pass
+        # Children wait for the root span
+        assert exporter.spans == []
+
+    assert current_span() is NOOP_SPAN
+    assert exporter.names() == ["query", "service", "request"]
+    query = exporter.spans[0]
+    assert query.parent_id == service.span_id
+    assert service.parent_id == root.span_id
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    assert root.attributes == {"route": "/packages"}
+    assert root.duration_ms >= 0
+
+
+def test_exception_marks_span(exporter: InMemoryExporter):
+    with pytest.raises(ValueError):
+        with tracer.span("request"):
+            raise ValueError("bad input")
+
+    (span,) = exporter.spans
+    assert span.status == "error"
+    assert span.error == "ValueError: bad input"
+    assert span.to_dict()["status"] == {"code": 2, "message": "ValueError: bad input"}
+
+
+def test_unsampled_trace_records_nothing(exporter: InMemoryExporter):
+    tracer.sample_rate = 0.0
+
+    with tracer.span("request") as root:
+        with tracer.span("service") as child:
+            assert tracer.start_span("query") is NOOP_SPAN
+
+    assert root is NOOP_SPAN and child is NOOP_SPAN
+    assert exporter.spans == []
+
+
+def test_start_span_needs_a_trace(exporter: InMemoryExporter):
+    assert tracer.start_span("query") is NOOP_SPAN
+
+    with tracer.span("request"):
+        span = tracer.start_span("query", statement="SELECT 1")
+        span.end()
+
+    assert exporter.names() == ["query", "request"]
+
+
+@pytest.mark.asyncio
+async def test_traced_decorator_and_task_propagation(exporter: InMemoryExporter):
+    @traced()
+    async def load():
+        await asyncio.sleep(0)
+        return 1
+
+    @traced("compute")
+    def compute():
+        return 2
+
+    with tracer.span("request"):
+        assert await asyncio.create_task(load()) == 1
+        assert compute() == 2
+
+    names = exporter.names()
+    assert names[-1] == "request"
+    assert "compute" in names
+    assert any(name.endswith("<locals>.load") for name in names)
+    root = exporter.spans[-1]
+    assert all(span.parent_id == root.span_id for span in exporter.spans[:-1])
+
+
+def test_jsonl_exporter_writes_otlp_requests(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    local_tracer = Tracer()
+    local_tracer.configure(JsonLinesExporter(path, service_name="api"))
+
+    with local_tracer.span("request", **{"http.status_code": 200, "cached": True}):
+        with local_tracer.span("query", statement="SELECT 1"):
+            pass
+    with local_tracer.span("second"):
+        pass
+    local_tracer.shutdown()
+
+    # One export request per trace
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    (resource_spans,) = first["resourceSpans"]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "api"}}
+    ]
+    (scope_spans,) = resource_spans["scopeSpans"]
+    assert scope_spans["scope"] == {"name": "app.core.tracing"}
+    query, request = scope_spans["spans"]
+    assert request["name"] == "request"
+    assert request["parentSpanId"] == ""
+    assert query["parentSpanId"] == request["spanId"]
+    assert query["traceId"] == request["traceId"]
+    assert int(request["endTimeUnixNano"]) >= int(request["startTimeUnixNano"])
+    assert request["attributes"] == [
+        {"key": "http.status_code", "value": {"intValue": "200"}},
+        {"key": "cached", "value": {"boolValue": True}},
+    ]
+    assert query["attributes"] == [
+        {"key": "statement", "value": {"stringValue": "SELECT 1"}}
+    ]
+    (span,) = second["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert span["name"] == "second"
+
+
+@pytest_asyncio.fixture
+async def package_service(async_session_maker):
+    async with async_session_maker() as session:
+        yield PackageService(PackageRepository(session))
+
+
+@pytest.mark.asyncio
+async def test_service_repository_and_queries_are_traced(
+    package_service: PackageService, exporter: InMemoryExporter
+):
+    package = await package_service.create_package(
+        PackageCreate(name="Book", weight=1.0, type_id=1, content_cost=10.0),
+        "session",
+    )
+    exporter.clear()
+
+    with tracer.span("request"):
+        await package_service.get_package_by_id(package.id, "session")
+
+    spans = {span.name: span for span in exporter.spans}
+    service = spans["PackageService.get_package_by_id"]
+    repository = spans["PackageRepository.get"]
+    query = spans["db.query"]
+    assert service.parent_id == spans["request"].span_id
+    assert repository.parent_id == service.span_id
+    assert query.parent_id == repository.span_id
+    assert query.attributes["statement"].startswith("SELECT")
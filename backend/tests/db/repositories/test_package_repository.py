@@ -0,0 +1,111 @@
+import pytest
+import pytest_asyncio
+from app.api.v1.schemas.package import PackageBase
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.models.package import Package
+from app.db.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SESSION_ID = "session-a"
+
+
+@pytest_asyncio.fixture
+async def packages(async_session: AsyncSession) -> list[Package]:
+    rows = [
+        Package(name=f"p{i}", weight=1.0, content_cost=10.0, user_session=SESSION_ID)
+        for i in range(5)
+    ]
+    rows.append(
+        Package(name="other", weight=1.0, content_cost=10.0, user_session="session-b")
+    )
+    async_session.add_all(rows)
+    await async_session.commit()
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_list_applies_skip_and_limit(async_session: AsyncSession, packages):
+    repository = PackageRepository(async_session)
+
+    results = await repository.list(SESSION_ID, skip=1, limit=2)
+
+    assert [item.id for item in results] == [packages[1].id, packages[2].id]
+
+
+@pytest.mark.asyncio
+async def test_list_after_returns_next_keyset_page(
+    async_session: AsyncSession, packages
+):
+    repository = PackageRepository(async_session)
+
+    results = await repository.list_after(SESSION_ID, after_id=packages[2].id, limit=10)
+
+    assert [item.id for item in results] == [packages[3].id, packages[4].id]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_cover_session_once(async_session: AsyncSession, packages):
+    service = PackageService(PackageRepository(async_session))
+
+    seen, cursor = [], None
+    while True:
+        page = await service.get_packages_page(SESSION_ID, cursor=cursor, limit=2)
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [package.id for package in packages[:5]]
+
+
+@pytest.mark.asyncio
+async def test_package_without_pricing_fields_is_readable(
+    async_session: AsyncSession,
+):
+    package = Package(name=None, user_session=SESSION_ID)
+    async_session.add(package)
+    await async_session.commit()
+    repository = PackageRepository(async_session)
+
+    fetched = await repository.get(package.id, SESSION_ID)
+    listed = await repository.list(SESSION_ID)
+
+    assert fetched.weight is None and fetched.content_cost is None
+    assert [item.id for item in listed] == [package.id]
+
+
+def test_cursor_round_trip() -> None:
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1)[:-2] + "!!"])
+def test_decode_cursor_rejects_garbage(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_returns_ids_in_order(async_session: AsyncSession):
+    repository = PackageRepository(async_session)
+    items = [
+        PackageBase(name=f"bulk{i}", weight=1.0 + i, type_id=1, content_cost=5.0)
+        for i in range(3)
+    ]
+
+    ids = await repository.bulk_create(items, SESSION_ID)
+
+    stored = await repository.list(SESSION_ID)
+    assert ids == [item.id for item in stored]
+    assert len(set(ids)) == 3
+
+
+@pytest.mark.asyncio
+async def test_backlog_count_uses_delivery_cost_index(async_session: AsyncSession):
+    query = select(func.count()).where(Package.delivery_cost.is_(None))
+    compiled = query.compile(async_session.bind, compile_kwargs={"literal_binds": True})
+
+    plan = await async_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+
+    assert "ix_packages_delivery_cost_id" in " ".join(str(row) for row in plan)
@@ -0,0 +1,53 @@
+import pytest
+from app.api.v1.schemas.package import PackageOut
+from app.db.codecs import CODECS, CompressedCodec, JsonCodec, get_codec
+from app.db.redis import RedisRepository
+from app.external.CBRF_client import RateTable
+
+PACKAGE = PackageOut(
+    id=1, name="p", weight=2.0, type_id=1, content_cost=100.0, delivery_cost=200.0
+)
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_models_round_trip(name: str) -> None:
+    codec = get_codec(name)
+    table = RateTable.from_valute("2024-02-20", {"USD": {"Nominal": 1, "Value": 92.5}})
+
+    assert PackageOut.model_validate(codec.decode(codec.encode(PACKAGE))) == PACKAGE
+    restored = RateTable.from_dict(codec.decode(codec.encode(table)))
+    assert restored.rate("USD") == 92.5
+
+
+def test_compression_only_above_threshold() -> None:
+    codec = CompressedCodec(JsonCodec(), threshold=256)
+    small = codec.encode(PACKAGE)
+    large = codec.encode([PACKAGE] * 100)
+
+    assert small[:1] == CompressedCodec.RAW
+    assert large[:1] == CompressedCodec.ZLIB
+    assert len(large) < len(JsonCodec().encode([PACKAGE] * 100)) / 5
+    assert len(codec.decode(large)) == 100
+
+
+def test_unknown_codec_falls_back_to_json() -> None:
+    assert get_codec("nope").name == "json"
+    assert get_codec("json", compress_threshold=10).name == "json+zlib"
+
+
+def test_compressed_codec_rejects_unknown_header() -> None:
+    codec = CompressedCodec(JsonCodec(), threshold=256)
+
+    # Written by the plain JSON codec before compression was enabled
+    with pytest.raises(ValueError):
+        codec.decode(JsonCodec().encode(PACKAGE))
+
+
+def test_value_keys_are_namespaced_by_codec() -> None:
+    plain = RedisRepository("redis://localhost:1/0", codec=JsonCodec())
+    compressed = RedisRepository(
+        "redis://localhost:1/0", codec=CompressedCodec(JsonCodec())
+    )
+
+    assert plain.value_key("rates") == "rates:json"
+    assert compressed.value_key("rates") == "rates:json+zlib"
@@ -0,0 +1,32 @@
+import pytest
+from app.db.redis import RedisRepository, get_redis
+from fastapi import FastAPI
+from starlette.requests import Request
+
+
+@pytest.mark.asyncio
+async def test_pool_size_is_honoured() -> None:
+    repository = RedisRepository("redis://localhost:6379/0", max_connections=3)
+
+    assert repository._pool.max_connections == 3
+    await repository.close()
+
+
+@pytest.mark.asyncio
+async def test_get_redis_returns_shared_client() -> None:
+    app = FastAPI()
+    app.state.redis = RedisRepository("redis://localhost:6379/0")
+    request = Request({"type": "http", "app": app})
+
+    assert get_redis(request) is get_redis(request) is app.state.redis
+    await app.state.redis.close()
+
+
+@pytest.mark.asyncio
+async def test_empty_batches_skip_round_trip() -> None:
+    # No server is listening: any command would fail to connect
+    repository = RedisRepository("redis://localhost:1/0")
+
+    assert await repository.mget([]) == []
+    assert await repository.mset({}) is True
+    await repository.close()
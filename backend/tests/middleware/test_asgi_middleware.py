@@ -0,0 +1,81 @@
+import pytest
+from app.core.tracing import InMemoryExporter, tracer
+from app.middleware.logging import LoggingMiddleware
+from app.middleware.session import SessionMiddleware
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware)
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/state")
+    async def state(request: Request):
+        return {
+            "session_id": request.state.session_id,
+            "request_id": request.state.request_id,
+        }
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+@pytest.fixture
+def client() -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_new_session_is_issued(client: AsyncClient) -> None:
+    response = await client.get("/state")
+
+    body = response.json()
+    assert response.headers["X-Session-ID"] == body["session_id"]
+    assert response.cookies["session_id"] == body["session_id"]
+    assert response.headers["X-Request-ID"] == body["request_id"]
+    assert float(response.headers["X-Request-Time"]) >= 0
+
+
+@pytest.mark.asyncio
+async def test_session_taken_from_cookie_or_header(client: AsyncClient) -> None:
+    from_header = await client.get("/state", headers={"X-Session-ID": "abc"})
+    from_cookie = await client.get("/state", headers={"Cookie": "session_id=xyz"})
+
+    assert from_header.json()["session_id"] == "abc"
+    assert from_cookie.json()["session_id"] == "xyz"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through(client: AsyncClient) -> None:
+    response = await client.get("/stream", headers={"X-Session-ID": "abc"})
+
+    assert response.text == "0\n1\n2\n"
+    assert response.headers["X-Session-ID"] == "abc"
+    assert "X-Request-ID" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_request_is_root_span(client: AsyncClient) -> None:
+    exporter = InMemoryExporter()
+    tracer.configure(exporter)
+    try:
+        response = await client.get("/state")
+    finally:
+        tracer.configure(None, enabled=False)
+
+    (span,) = exporter.spans
+    assert span.name == "http.request"
+    assert span.parent_id is None
+    assert span.attributes["request_id"] == response.headers["X-Request-ID"]
+    assert span.attributes["http.route"] == "/state"
+    assert span.attributes["http.status_code"] == 200
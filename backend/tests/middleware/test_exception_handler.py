@@ -0,0 +1,213 @@
+import asyncio
+import logging
+
+import pytest
+from app.core.exceptions import DatabaseError
+from app.core.logger import logger
+from app.middleware.exception_handler import (
+    OTHER_ERRORS,
+    ErrorLogLimiter,
+    exception_fingerprint,
+    setup_exception_handlers,
+)
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    @property
+    def tracebacks(self):
+        return [record for record in self.records if record.exc_info]
+
+
+@pytest.fixture
+def log_records():
+    handler = CollectingHandler()
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def make_app(limiter: ErrorLogLimiter) -> FastAPI:
+    app = FastAPI()
+    setup_exception_handlers(app, limiter)
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Package not found")
+
+    @app.get("/broken")
+    async def broken():
+        raise RuntimeError("boom")
+
+    @app.get("/database")
+    async def database():
+        raise DatabaseError()
+
+    return app
+
+
+def make_client(limiter: ErrorLogLimiter) -> AsyncClient:
+    transport = ASGITransport(app=make_app(limiter))
+    return AsyncClient(transport=transport, base_url="http://test")
+
+
+def raise_at_same_line(exc: Exception) -> Exception:
+    try:
+        raise exc
+    except Exception as e:
+        return e
+
+
+def test_fingerprint_groups_by_type_and_location():
+    first = raise_at_same_line(RuntimeError("a"))
+    second = raise_at_same_line(RuntimeError("b"))
+    other = raise_at_same_line(ValueError("a"))
+
+    assert exception_fingerprint(first) == exception_fingerprint(second)
+    assert exception_fingerprint(first) != exception_fingerprint(other)
+    assert exception_fingerprint(RuntimeError()) == "builtins.RuntimeError"
+
+
+def test_limiter_summarizes_suppressed_errors(log_records):
+    clock = FakeClock()
+    limiter = ErrorLogLimiter(burst=2, window=60, clock=clock)
+
+    assert [limiter.allow("db") for _ in range(5)] == [True, True, False, False, False]
+    assert limiter.suppressed() == {"db": 3}
+    assert not log_records.records
+
+    clock.now = 61
+    assert limiter.allow("db")
+
+    (summary,) = log_records.records
+    assert summary.getMessage().startswith("3 similar errors suppressed")
+    assert summary.suppressed == 3
+    assert limiter.suppressed() == {}
+
+
+def test_limiter_flushes_idle_fingerprints(log_records):
+    clock = FakeClock()
+    limiter = ErrorLogLimiter(burst=1, window=60, clock=clock)
+    limiter.allow("redis")
+    limiter.allow("redis")
+
+    clock.now = 61
+    limiter.allow("db")
+
+    assert [record.fingerprint for record in log_records.records] == ["redis"]
+    assert limiter.suppressed() == {}
+
+
+def test_limiter_bounds_fingerprints():
+    limiter = ErrorLogLimiter(burst=1, window=60, max_fingerprints=2, clock=FakeClock())
+
+    assert limiter.allow("a")
+    assert limiter.allow("b")
+    assert not limiter.allow("c")
+    assert not limiter.allow("d")
+    assert limiter.suppressed() == {OTHER_ERRORS: 2}
+
+
+@pytest.mark.asyncio
+async def test_flusher_summarizes_flood_that_stopped(log_records):
+    limiter = ErrorLogLimiter(burst=1, window=0.05)
+    await limiter.start()
+    try:
+        for _ in range(10):
+            limiter.allow("db")
+
+        # No further errors arrive to trigger the summary from allow()
+        await asyncio.sleep(0.2)
+    finally:
+        await limiter.stop()
+
+    (summary,) = log_records.records
+    assert summary.suppressed == 9
+    assert limiter.suppressed() == {}
+
+
+@pytest.mark.asyncio
+async def test_stop_logs_open_windows(log_records):
+    limiter = ErrorLogLimiter(burst=1, window=60)
+    await limiter.start()
+    limiter.allow("db")
+    limiter.allow("db")
+
+    await limiter.stop()
+
+    (summary,) = log_records.records
+    assert summary.suppressed == 1
+    assert limiter.task.done()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_logged_without_traceback(log_records):
+    async with make_client(ErrorLogLimiter()) as client:
+        response = await client.get("/missing")
+
+    assert response.status_code == 404
+    (record,) = log_records.records
+    assert record.levelno == logging.WARNING
+    assert record.exc_info is None
+
+
+@pytest.mark.asyncio
+async def test_error_flood_logs_bounded_tracebacks(log_records):
+    clock = FakeClock()
+    limiter = ErrorLogLimiter(burst=1, window=60, clock=clock)
+
+    async with make_client(limiter) as client:
+        for _ in range(200):
+            assert (await client.get("/broken")).status_code == 500
+            assert (await client.get("/database")).status_code == 503
+
+        # One traceback per distinct error, the rest are only counted
+        assert len(log_records.records) == 2
+        assert len(log_records.tracebacks) == 2
+        assert sorted(limiter.suppressed().values()) == [199, 199]
+
+        clock.now = 61
+        await client.get("/broken")
+
+    summaries = [r for r in log_records.records if hasattr(r, "suppressed")]
+    assert sorted(r.suppressed for r in summaries) == [199, 199]
+    assert len(log_records.tracebacks) == 3
+
+
+@pytest.mark.asyncio
+async def test_error_after_response_started_is_not_reraised(log_records):
+    app = FastAPI()
+    setup_exception_handlers(app, ErrorLogLimiter())
+
+    async def chunks():
+        yield b"partial"
+        raise RuntimeError("stream broke")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(chunks())
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.content == b"partial"
+    assert len(log_records.tracebacks) == 1
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+from app.core.config import settings
+from app.core.exceptions import ExternalAPIClientError
+from app.db.codecs import get_codec
+from app.external.CBRF_client import RateTable
+from app.services import cbrf as cbrf_module
+from app.services.cbrf import CBRFRateRefresher, CBRFService
+from pytest import MonkeyPatch
+
+from ..utils import FakeRedis
+
+VALUTE = {
+    "USD": {"Nominal": 1, "Value": 92.5},
+    "EUR": {"Nominal": 1, "Value": 100.0},
+    "JPY": {"Nominal": 100, "Value": 61.5},
+}
+
+
+class FakeCBRFClient:
+    calls = 0
+
+    async def __aenter__(self) -> "FakeCBRFClient":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    async def get_rate_table(self) -> RateTable:
+        FakeCBRFClient.calls += 1
+        await asyncio.sleep(0.01)
+        return RateTable.from_valute("2024-02-20", VALUTE)
+
+
+@pytest.fixture(autouse=True)
+def fake_cbrf_client(monkeypatch: MonkeyPatch) -> None:
+    FakeCBRFClient.calls = 0
+    monkeypatch.setattr(cbrf_module, "CBRFClient", FakeCBRFClient)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_make_one_upstream_call() -> None:
+    redis = FakeRedis(get_codec("json", compress_threshold=64))
+    service = CBRFService(redis)
+
+    results = await asyncio.gather(*(service.get_usd_rate() for _ in range(500)))
+
+    assert set(results) == {92.5}
+    assert FakeCBRFClient.calls == 1
+    # One read that missed and one write
+    assert redis.commands == 2
+    cached = RateTable.from_dict(
+        redis.codec.decode(redis.data[f"{settings.REDIS_DATA_KEY}:json+zlib"])
+    )
+    assert cached.rate("EUR") == 100.0
+
+
+@pytest.mark.asyncio
+async def test_hot_path_skips_redis() -> None:
+    redis = FakeRedis()
+    service = CBRFService(redis)
+    await service.get_daily_rates()
+
+    await service.get_daily_rates()
+
+    assert redis.commands == 2
+
+
+@pytest.mark.asyncio
+async def test_rates_are_read_back_from_redis() -> None:
+    redis = FakeRedis()
+    await CBRFService(redis).get_daily_rates()
+
+    rates = await CBRFService(redis).get_daily_rates()
+
+    assert rates == {"Date": "2024-02-20", "Valute": 92.5}
+    assert FakeCBRFClient.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_last_known_rates_served_while_upstream_down(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    service = CBRFService(FakeRedis(), memory_ttl=0)
+    await service.get_daily_rates()
+
+    async def failing_get_rate_table(self) -> RateTable:
+        raise ExternalAPIClientError("Max retries exceeded")
+
+    monkeypatch.setattr(FakeCBRFClient, "get_rate_table", failing_get_rate_table)
+    service._redis.data.clear()
+
+    assert await service.get_usd_rate() == 92.5
+
+
+@pytest.mark.asyncio
+async def test_stale_rates_returned_without_waiting_for_refresh(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    service = CBRFService(FakeRedis(), memory_ttl=0)
+    await service.get_daily_rates()
+    refresh_started = asyncio.Event()
+
+    async def slow_get_rate_table(self) -> RateTable:
+        refresh_started.set()
+        await asyncio.sleep(10)
+        return RateTable.from_valute("2024-02-21", VALUTE)
+
+    monkeypatch.setattr(FakeCBRFClient, "get_rate_table", slow_get_rate_table)
+    service._redis.data.clear()
+
+    rate = await asyncio.wait_for(service.get_usd_rate(), timeout=0.1)
+
+    assert rate == 92.5
+    await asyncio.wait_for(refresh_started.wait(), timeout=0.1)
+    service._inflight.cancel()
+
+
+@pytest.mark.asyncio
+async def test_refresher_prefetches_before_expiry() -> None:
+    service = CBRFService(FakeRedis(), memory_ttl=0.2)
+    refresher = CBRFRateRefresher(service, prefetch_margin=0.15, min_interval=0.01)
+
+    await refresher.start()
+    assert FakeCBRFClient.calls == 1
+    assert refresher.next_delay() <= 0.05
+    await asyncio.sleep(0.12)
+    await refresher.stop()
+
+    assert service.seconds_until_stale > 0
+    # The first load missed and wrote, the prefetch read Redis again
+    assert service._redis.commands >= 3
+
+
+def test_refresh_aligned_to_next_publication() -> None:
+    service = CBRFService(FakeRedis(), memory_ttl=3600)
+    published = datetime.now(timezone.utc) - timedelta(days=1) + timedelta(minutes=2)
+    service._table = RateTable.from_valute(
+        "2024-02-21", VALUTE, timestamp=published.isoformat()
+    )
+    service._rates_expires_at = time.monotonic() + 3600
+    refresher = CBRFRateRefresher(service, prefetch_margin=30, publication_grace=60)
+
+    assert 170 < refresher.next_delay() <= 180
+
+
+@pytest.mark.asyncio
+async def test_refresher_backs_off_while_rates_are_unchanged() -> None:
+    service = CBRFService(FakeRedis(), memory_ttl=3600)
+    published = datetime.now(timezone.utc) - timedelta(days=2)
+    table = RateTable.from_valute("2024-02-20", VALUTE, timestamp=published.isoformat())
+    service._table = table
+    service._rates_expires_at = time.monotonic() + 3600
+    refresher = CBRFRateRefresher(service, prefetch_margin=30, publication_grace=60)
+
+    async def same_table(from_upstream: bool = False) -> RateTable:
+        FakeCBRFClient.calls += from_upstream
+        return table
+
+    service.refresh = same_table
+    await refresher.refresh()
+    await refresher.refresh()
+
+    # The upstream was asked once and the next check waits out the grace
+    assert FakeCBRFClient.calls == 1
+    assert 50 < refresher.next_delay() <= 60
+
+
+def test_rate_table_lookups() -> None:
+    table = RateTable.from_valute("2024-02-20", VALUTE)
+
+    assert table.rate("RUB") == 1.0
+    assert table.rate("JPY") == pytest.approx(0.615)
+    assert table.rate("EUR") == 100.0
+    assert RateTable.from_dict(table.to_dict()).rate("USD") == 92.5
+    with pytest.raises(ValueError):
+        table.rate("XXX")
@@ -0,0 +1,40 @@
+import pytest
+from app.db.models.package import Package
+from app.services.delivery_cost_calculator import DeliveryCostCalculator
+
+
+class CountingCBRFClient:
+    def __init__(self, usd_rate: float) -> None:
+        self.usd_rate = usd_rate
+        self.calls = 0
+
+    async def get_daily_rates(self) -> dict:
+        self.calls += 1
+        return {"Date": "2024-02-20", "Valute": self.usd_rate}
+
+
+def test_compute_delivery_costs() -> None:
+    costs = DeliveryCostCalculator.compute_delivery_costs(
+        [2.0, 1.0], [100.0, 50.0], 90.0
+    )
+
+    assert costs == [180.0, 90.0]
+
+
+@pytest.mark.asyncio
+async def test_process_packages_fetches_rate_once() -> None:
+    client = CountingCBRFClient(usd_rate=92.5)
+    packages = [Package(weight=1.0 + i, content_cost=10.0) for i in range(100)]
+
+    await DeliveryCostCalculator(client).process_unprocessed_packages(packages)
+
+    assert client.calls == 1
+    assert packages[0].delivery_cost == round((1.0 * 0.5 + 10.0 * 0.01) * 92.5, 2)
+    assert all(package.delivery_cost is not None for package in packages)
+
+
+@pytest.mark.asyncio
+async def test_calculate_delivery_cost_single() -> None:
+    calculator = DeliveryCostCalculator(CountingCBRFClient(usd_rate=100.0))
+
+    assert await calculator.calculate_delivery_cost(2.0, 100.0) == 200.0
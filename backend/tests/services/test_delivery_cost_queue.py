@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from app.api.v1.schemas.package import PackageBase, PackageUpdate
+from app.db.models.package import Package
+from app.db.repositories.package_repository import PackageRepository
+from app.services.delivery_cost_queue import DeliveryCostQueue
+from app.services.package_service import PackageService
+
+USD_RATE = 100.0
+
+
+class FakeCBRFService:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_usd_rate(self) -> float:
+        self.calls += 1
+        return USD_RATE
+
+
+@pytest_asyncio.fixture
+async def delivery_cost_queue(async_session_maker):
+    queue = DeliveryCostQueue(
+        async_session_maker, FakeCBRFService(), workers=2, batch_window=0.001
+    )
+    await queue.start()
+    yield queue
+    await queue.stop()
+
+
+async def _delivery_cost(async_session_maker, package_id: int) -> float | None:
+    async with async_session_maker() as session:
+        return (await session.get(Package, package_id)).delivery_cost
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_created_packages_are_priced_by_queue(async_session_maker) -> None:
+    # Enqueued before the only worker starts, so they form one micro-batch
+    delivery_cost_queue = DeliveryCostQueue(
+        async_session_maker, FakeCBRFService(), workers=1, batch_window=0
+    )
+    async with async_session_maker() as session:
+        service = PackageService(PackageRepository(session), delivery_cost_queue)
+        ids = await service.create_packages(
+            [
+                PackageBase(name=f"p{i}", weight=2.0, type_id=1, content_cost=100.0)
+                for i in range(50)
+            ],
+            "s1",
+        )
+
+    await delivery_cost_queue.start()
+    try:
+        await asyncio.wait_for(delivery_cost_queue.join(), timeout=1)
+    finally:
+        await delivery_cost_queue.stop()
+
+    assert delivery_cost_queue.cbrf_service.calls == 1  # once per micro-batch
+    for package_id in ids:
+        assert await _delivery_cost(async_session_maker, package_id) == 200.0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_of_pricing_fields_reprices_package(
+    async_session_maker, delivery_cost_queue: DeliveryCostQueue
+) -> None:
+    async with async_session_maker() as session:
+        package = Package(
+            name="p", weight=2.0, type_id=1, content_cost=100.0, delivery_cost=200.0
+        )
+        package.user_session = "s1"
+        session.add(package)
+        await session.commit()
+
+        service = PackageService(PackageRepository(session), delivery_cost_queue)
+        await service.update_package(
+            package.id,
+            PackageUpdate(name="p", weight=4.0, type_id=1, content_cost=100.0),
+            "s1",
+        )
+
+    await asyncio.wait_for(delivery_cost_queue.join(), timeout=1)
+
+    assert await _delivery_cost(async_session_maker, package.id) == 300.0
@@ -0,0 +1,146 @@
+import pytest
+import pytest_asyncio
+from app.api.v1.schemas.package import PackageOut, PackageUpdate
+from app.core.scheduler import DeliveryCostScheduler
+from app.db.models.package import Package
+from app.db.repositories.package_repository import PackageRepository
+from app.services.package_cache import PackageCache
+from app.services.package_service import PackageList, PackageService
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..utils import FakeRedis
+
+SESSION_ID = "session-a"
+
+
+class CountingRepository(PackageRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+        self.reads = 0
+
+    async def get(self, id: int, user_session: str):
+        self.reads += 1
+        return await super().get(id, user_session)
+
+    async def list(self, user_session: str, skip: int = 0, limit: int = 100):
+        self.reads += 1
+        return await super().list(user_session, skip=skip, limit=limit)
+
+
+class FakeCBRFService:
+    async def get_usd_rate(self) -> float:
+        return 100.0
+
+
+@pytest_asyncio.fixture
+async def package(async_session: AsyncSession) -> Package:
+    package = Package(
+        name="p", weight=2.0, type_id=1, content_cost=100.0, user_session=SESSION_ID
+    )
+    async_session.add(package)
+    await async_session.commit()
+    return package
+
+
+@pytest.fixture
+def cache() -> PackageCache:
+    return PackageCache(FakeRedis(), ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_skip_database(
+    async_session: AsyncSession, package: Package, cache: PackageCache
+) -> None:
+    repository = CountingRepository(async_session)
+    service = PackageService(repository, cache=cache)
+
+    first = await service.get_package_by_id(package.id, SESSION_ID)
+    second = await service.get_package_by_id(package.id, SESSION_ID)
+    await service.get_packages(SESSION_ID)
+    await service.get_packages(SESSION_ID)
+
+    assert first == second
+    assert repository.reads == 2
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_ratio": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_other_session_does_not_see_cached_package(
+    async_session: AsyncSession, package: Package, cache: PackageCache
+) -> None:
+    service = PackageService(PackageRepository(async_session), cache=cache)
+    await service.get_package_by_id(package.id, SESSION_ID)
+
+    assert await service.get_package_by_id(package.id, "session-b") is None
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_invalidate(
+    async_session: AsyncSession, package: Package, cache: PackageCache
+) -> None:
+    service = PackageService(PackageRepository(async_session), cache=cache)
+    await service.get_package_by_id(package.id, SESSION_ID)
+    await service.get_packages(SESSION_ID)
+
+    await service.update_package(
+        package.id,
+        PackageUpdate(name="renamed", weight=2.0, type_id=1, content_cost=100.0),
+        SESSION_ID,
+    )
+
+    assert (await service.get_package_by_id(package.id, SESSION_ID)).name == "renamed"
+    assert (await service.get_packages(SESSION_ID))[0].name == "renamed"
+
+    await service.delete_package(package.id, SESSION_ID)
+
+    assert await service.get_package_by_id(package.id, SESSION_ID) is None
+    assert await service.get_packages(SESSION_ID) == []
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_overwritten(
+    async_session: AsyncSession, package: Package, cache: PackageCache
+) -> None:
+    repository = PackageRepository(async_session)
+    service = PackageService(repository, cache=cache)
+    stale = PackageOut.model_validate(await repository.get(package.id, SESSION_ID))
+
+    async def load_then_race_a_write(value):
+        # A concurrent update commits and invalidates after this read
+        await cache.invalidate(SESSION_ID, [package.id])
+        return value
+
+    await cache.get_package(
+        SESSION_ID, package.id, lambda: load_then_race_a_write(stale)
+    )
+    await cache.get_list(
+        SESSION_ID,
+        "list:0:100",
+        PackageList,
+        lambda: load_then_race_a_write(PackageList([stale])),
+    )
+
+    assert cache._item_key(SESSION_ID, package.id) not in cache._redis.data
+    assert cache._lists_key(SESSION_ID) not in cache._redis.data
+    await service.get_package_by_id(package.id, SESSION_ID)
+    assert cache._item_key(SESSION_ID, package.id) in cache._redis.data
+
+
+@pytest.mark.asyncio
+async def test_scheduler_pricing_invalidates(
+    async_session_maker, async_session: AsyncSession, package: Package, cache
+) -> None:
+    service = PackageService(PackageRepository(async_session), cache=cache)
+    assert (
+        await service.get_package_by_id(package.id, SESSION_ID)
+    ).delivery_cost is None
+
+    scheduler = DeliveryCostScheduler(
+        async_session_maker, cbrf_service=FakeCBRFService(), package_cache=cache
+    )
+    await scheduler.process_delivery_costs_set_based()
+
+    async with async_session_maker() as session:
+        service = PackageService(PackageRepository(session), cache=cache)
+        priced = await service.get_package_by_id(package.id, SESSION_ID)
+    assert priced.delivery_cost == 200.0
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+
+import pytest
+import pytest_asyncio
+from app.api.v1.schemas.package import ExportFormat
+from app.db.models.package import Package
+from app.services.package_export import EXPORT_COLUMNS, stream_packages
+
+
+@pytest_asyncio.fixture
+async def seeded_session_maker(async_session_maker):
+    async with async_session_maker() as session:
+        session.add_all(
+            [
+                Package(name=f"p{i}", weight=1.5, content_cost=10.0, user_session="s1")
+                for i in range(5)
+            ]
+            + [Package(name="foreign", weight=1.0, content_cost=1.0, user_session="s2")]
+        )
+        await session.commit()
+    return async_session_maker
+
+
+async def _collect(session_maker, export_format: ExportFormat) -> list[str]:
+    return [
+        chunk
+        async for chunk in stream_packages(
+            session_maker, "s1", export_format, batch_size=2
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_in_batches(seeded_session_maker) -> None:
+    chunks = await _collect(seeded_session_maker, ExportFormat.ndjson)
+
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [record["name"] for record in records] == [f"p{i}" for i in range(5)]
+    assert set(records[0]) == set(EXPORT_COLUMNS)
+
+
+@pytest.mark.asyncio
+async def test_csv_export_starts_with_header(seeded_session_maker) -> None:
+    chunks = await _collect(seeded_session_maker, ExportFormat.csv)
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == list(EXPORT_COLUMNS)
+    assert len(rows) == 6
@@ -0,0 +1,81 @@
+import pytest
+import pytest_asyncio
+from app.db.models.package import Package
+from app.db.repositories.package_repository import PackageRepository
+from app.external.CBRF_client import RateTable
+from app.services.package_service import PackageService
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SESSION_ID = "session-a"
+
+
+class FakeCBRFService:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_rate_table(self) -> RateTable:
+        self.calls += 1
+        return RateTable.from_valute(
+            "2024-02-20",
+            {
+                "USD": {"Nominal": 1, "Value": 80.0},
+                "JPY": {"Nominal": 100, "Value": 50.0},
+            },
+        )
+
+
+@pytest_asyncio.fixture
+async def service(async_session: AsyncSession) -> PackageService:
+    async_session.add_all(
+        [
+            Package(
+                name="priced",
+                weight=1.0,
+                content_cost=10.0,
+                delivery_cost=400.0,
+                user_session=SESSION_ID,
+            ),
+            Package(
+                name="pending", weight=1.0, content_cost=10.0, user_session=SESSION_ID
+            ),
+        ]
+    )
+    await async_session.commit()
+    return PackageService(
+        PackageRepository(async_session), cbrf_service=FakeCBRFService()
+    )
+
+
+@pytest.mark.asyncio
+async def test_packages_default_to_rubles(service: PackageService) -> None:
+    packages = await service.get_packages(SESSION_ID)
+
+    assert [(item.delivery_cost, item.currency) for item in packages] == [
+        (400.0, "RUB"),
+        (None, "RUB"),
+    ]
+    assert service.cbrf_service.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_page_converted_with_one_rate_lookup(service: PackageService) -> None:
+    page = await service.get_packages_page(SESSION_ID, currency="usd")
+
+    assert [(item.delivery_cost, item.currency) for item in page.items] == [
+        (5.0, "USD"),
+        (None, "USD"),
+    ]
+    assert service.cbrf_service.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rates_use_currency_nominal(service: PackageService) -> None:
+    packages = await service.get_packages(SESSION_ID, currency="JPY")
+
+    assert packages[0].delivery_cost == 800.0
+
+
+@pytest.mark.asyncio
+async def test_unknown_currency_rejected(service: PackageService) -> None:
+    with pytest.raises(ValueError):
+        await service.get_packages(SESSION_ID, currency="XXX")
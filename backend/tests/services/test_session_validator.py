@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from app.db.models.user_session import UserSession
+from app.services.session_validator import SessionValidator
+from sqlalchemy import event, select
+
+from tests.utils import FakeRedis
+
+
+@pytest_asyncio.fixture
+async def statements(async_session_maker):
+    executed = []
+    engine = async_session_maker.kw["bind"].sync_engine
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+async def _last_activity(async_session_maker, session_id: str) -> datetime:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(UserSession.last_activity).where(UserSession.id == session_id)
+        )
+        return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_known_session_needs_no_query(async_session_maker, statements) -> None:
+    validator = SessionValidator(async_session_maker, FakeRedis())
+
+    async with async_session_maker() as db:
+        await validator.validate("s1", db)
+        first_request = len(statements)
+        for _ in range(100):
+            await validator.validate("s1", db)
+
+    assert first_request > 0
+    assert len(statements) == first_request
+
+
+@pytest.mark.asyncio
+async def test_redis_shares_known_sessions(async_session_maker, statements) -> None:
+    redis = FakeRedis()
+    async with async_session_maker() as db:
+        await SessionValidator(async_session_maker, redis).validate("s1", db)
+        statements.clear()
+
+        # Another worker with a cold LRU
+        await SessionValidator(async_session_maker, redis).validate("s1", db)
+
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_activity_flushed_in_one_update(async_session_maker, statements) -> None:
+    validator = SessionValidator(async_session_maker, max_size=2)
+    async with async_session_maker() as db:
+        for session_id in ("s1", "s2", "s3"):
+            await validator.validate(session_id, db)
+    before = await _last_activity(async_session_maker, "s1")
+    validator.touch("s1")
+    validator._activity["s1"] += timedelta(minutes=5)
+    statements.clear()
+
+    updated = await validator.flush()
+
+    assert updated == 3
+    assert [s.split()[0] for s in statements] == ["UPDATE"]
+    assert await _last_activity(async_session_maker, "s1") > before
+    assert await validator.flush() == 0
+    assert len(validator._known) == 2
+
+
+@pytest.mark.asyncio
+async def test_forget_drops_cached_session(async_session_maker) -> None:
+    redis = FakeRedis()
+    validator = SessionValidator(async_session_maker, redis)
+    async with async_session_maker() as db:
+        await validator.validate("s1", db)
+
+    await validator.forget(["s1"])
+
+    assert "s1" not in validator._known
+    assert redis.data == {}
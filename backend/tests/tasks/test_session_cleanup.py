@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from app.db.models.package import Package
+from app.db.models.user_session import UserSession
+from app.db.repositories.user_session_repository import UserSessionRepository
+from app.services.session_validator import SessionValidator
+from app.taks.session_cleanup import CleanupResult, SessionCleanupJob
+from sqlalchemy import func, select
+
+from tests.utils import FakeRedis
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def sessions(async_session_maker) -> None:
+    async with async_session_maker() as session:
+        for i in range(5):
+            session.add(
+                UserSession(
+                    id=f"old-{i}",
+                    created_at=NOW,
+                    last_activity=NOW - timedelta(days=30),
+                )
+            )
+        session.add(UserSession(id="active", created_at=NOW, last_activity=NOW))
+        session.add_all(
+            Package(name="p", weight=1.0, content_cost=1.0, user_session=f"old-{i % 5}")
+            for i in range(23)
+        )
+        session.add_all(
+            Package(name="p", weight=1.0, content_cost=1.0, user_session="active")
+            for _ in range(3)
+        )
+        session.add(Package(name="orphan", weight=1.0, content_cost=1.0))
+        session.add(
+            Package(name="orphan", weight=1.0, content_cost=1.0, user_session="gone")
+        )
+        await session.commit()
+
+
+async def _count(async_session_maker, model) -> int:
+    async with async_session_maker() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_run_removes_expired_sessions_in_batches(
+    async_session_maker, sessions
+) -> None:
+    job = SessionCleanupJob(
+        async_session_maker, lifetime_seconds=86400, batch_size=2, batch_pause=0
+    )
+
+    result = await job.run_once()
+
+    assert result == CleanupResult(sessions=5, packages=23, orphaned_packages=2)
+    assert await _count(async_session_maker, UserSession) == 1
+    assert await _count(async_session_maker, Package) == 3
+    assert await job.run_once() == CleanupResult()
+
+
+@pytest.mark.asyncio
+async def test_pending_activity_keeps_session(async_session_maker, sessions) -> None:
+    redis = FakeRedis()
+    validator = SessionValidator(async_session_maker, redis)
+    async with async_session_maker() as db:
+        await validator.validate("old-0", db)
+        await validator.validate("old-1", db)
+    validator._activity.pop("old-1")
+    job = SessionCleanupJob(
+        async_session_maker,
+        lifetime_seconds=86400,
+        batch_pause=0,
+        session_validator=validator,
+    )
+
+    result = await job.run_once()
+
+    assert result.sessions == 4
+    assert "old-1" not in validator._known
+    assert "old-0" in validator._known
+    assert list(redis.data) == ["sessions:known:old-0"]
+
+
+@pytest.mark.asyncio
+async def test_session_active_again_after_listing_is_kept(
+    async_session_maker, sessions, monkeypatch
+) -> None:
+    redis = FakeRedis()
+    validator = SessionValidator(async_session_maker, redis)
+    async with async_session_maker() as db:
+        await validator.validate("old-2", db)
+    validator._activity.clear()
+    list_expired_ids = UserSessionRepository.list_expired_ids
+
+    async def list_then_touch(self, *args, **kwargs):
+        ids = await list_expired_ids(self, *args, **kwargs)
+        # A request of old-2 is flushed right after the listing
+        await self.bulk_update_last_activity({"old-2": NOW})
+        return ids
+
+    monkeypatch.setattr(UserSessionRepository, "list_expired_ids", list_then_touch)
+    job = SessionCleanupJob(
+        async_session_maker,
+        lifetime_seconds=86400,
+        batch_pause=0,
+        session_validator=validator,
+    )
+
+    result = await job.delete_expired_sessions()
+
+    assert result == CleanupResult(sessions=4, packages=18)
+    assert await _count(async_session_maker, UserSession) == 2
+    assert await _count(async_session_maker, Package) == 3 + 5 + 2
+    assert "old-2" in validator._known
@@ -1,10 +1,16 @@
+import asyncio
+import time
 from typing import Any, Dict
 
+import httpx
 import pytest
-from app.core.exceptions import ExternalAPIClientError
-from app.external.base_client import BaseAPIClient
+from app.core.exceptions import CircuitOpenError, ExternalAPIClientError
+from app.external import base_client as base_client_module
+from app.external.base_client import BaseAPIClient, CircuitBreakerRegistry
 from pytest import MonkeyPatch
 
+from ..utils import stub_http_server
+
 
 class MockResponse:
     def json(self) -> Dict[str, Any]:
@@ -75,3 +81,125 @@ async def test_headers_setup(monkeypatch: MonkeyPatch) -> None:
         monkeypatch.setattr(client.client, "request", mock_request)
         await client.request("GET", "/test")
         assert "User-Agent" in headers_sent
+
+
+@pytest.fixture
+def breakers(monkeypatch: MonkeyPatch) -> CircuitBreakerRegistry:
+    registry = CircuitBreakerRegistry()
+    monkeypatch.setattr(base_client_module, "circuit_breakers", registry)
+    return registry
+
+
+def _stub_client(server, max_retries: int = 2) -> BaseAPIClient:
+    client = BaseAPIClient()
+    client.base_url = server.url
+    client.max_retries = max_retries
+    client.backoff_base = 0.001
+    client.backoff_max = 0.005
+    return client
+
+
+def _status(code: int):
+    def respond(handler):
+        return code, {"Content-Type": "application/json"}, b"{}"
+
+    return respond
+
+
+@pytest.mark.asyncio
+async def test_retryable_status_is_retried_with_backoff(breakers) -> None:
+    with stub_http_server(_status(503)) as server:
+        async with _stub_client(server, max_retries=2) as client:
+            with pytest.raises(ExternalAPIClientError):
+                await client.request("GET", "rates")
+
+    assert server.hits == 3
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried(breakers) -> None:
+    with stub_http_server(_status(404)) as server:
+        async with _stub_client(server) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.request("GET", "rates")
+
+    assert server.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_bounds_request_amplification(
+    breakers: CircuitBreakerRegistry,
+) -> None:
+    with stub_http_server(_status(503)) as server:
+        async with _stub_client(server, max_retries=2) as client:
+            breaker = breakers.get(client.client.base_url.host)
+            breaker.failure_threshold = 4
+            breaker.recovery_timeout = 60
+
+            results = await asyncio.gather(
+                *(client.request("GET", "rates") for _ in range(50)),
+                return_exceptions=True,
+            )
+
+    assert all(isinstance(r, ExternalAPIClientError) for r in results)
+    assert any(isinstance(r, CircuitOpenError) for r in results)
+    # Without the breaker this would be 50 * 3 requests
+    assert server.hits < 60
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_circuit(breakers: CircuitBreakerRegistry) -> None:
+    statuses = iter([503, 503, 200])
+
+    def respond(handler):
+        return next(statuses), {"Content-Type": "application/json"}, b"{}"
+
+    with stub_http_server(respond) as server:
+        async with _stub_client(server, max_retries=0) as client:
+            breaker = breakers.get(client.client.base_url.host)
+            breaker.failure_threshold = 2
+            breaker.recovery_timeout = 0.05
+
+            for _ in range(2):
+                with pytest.raises(ExternalAPIClientError):
+                    await client.request("GET", "rates")
+            with pytest.raises(CircuitOpenError):
+                await client.request("GET", "rates")
+
+            await asyncio.sleep(0.06)
+            assert await client.request("GET", "rates") == {}
+
+    assert breaker.state == "closed"
+    assert server.hits == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_releases_half_open_circuit(
+    breakers: CircuitBreakerRegistry,
+) -> None:
+    responses = iter([(503, 0), (503, 0), (200, 0.5), (200, 0)])
+
+    def respond(handler):
+        status, delay = next(responses)
+        time.sleep(delay)
+        return status, {"Content-Type": "application/json"}, b"{}"
+
+    with stub_http_server(respond) as server:
+        async with _stub_client(server, max_retries=0) as client:
+            breaker = breakers.get(client.client.base_url.host)
+            breaker.failure_threshold = 2
+            breaker.recovery_timeout = 0.05
+
+            for _ in range(2):
+                with pytest.raises(ExternalAPIClientError):
+                    await client.request("GET", "rates")
+            await asyncio.sleep(0.06)
+
+            # The trial request is cancelled, e.g. by a client disconnect
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.request("GET", "rates"), timeout=0.1)
+
+            assert await client.request("GET", "rates") == {}
+
+    assert breaker.state == "closed"
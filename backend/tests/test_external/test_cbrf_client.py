@@ -1,10 +1,14 @@
+import json
 from typing import Any, Dict, TypedDict
 
 import pytest
 from app.core.exceptions import ExternalAPIClientError
+from app.external.base_client import BaseAPIClient
 from app.external.CBRF_client import CBRFClient
 from pytest import MonkeyPatch
 
+from ..utils import stub_http_server
+
 
 class CBRFApiResponse(TypedDict):
     """Type definition for CBRF API response"""
@@ -62,3 +66,32 @@ async def test_real_cbrf_api_connection() -> None:
         # Verify data types
         assert isinstance(response["Date"], str)
         assert isinstance(response["Valute"], float)
+
+
+@pytest.mark.asyncio
+async def test_get_daily_rates_revalidates_with_etag(
+    monkeypatch: MonkeyPatch, mock_cbrf_response: CBRFApiResponse
+) -> None:
+    """A 304 answer returns the previously parsed rates"""
+    monkeypatch.setattr(BaseAPIClient, "_conditional_cache", {})
+    etag = '"rates-v1"'
+    not_modified = 0
+
+    def respond(handler):
+        nonlocal not_modified
+        if handler.headers.get("If-None-Match") == etag:
+            not_modified += 1
+            return 304, {"ETag": etag}, b""
+        headers = {"Content-Type": "application/json", "ETag": etag}
+        return 200, headers, json.dumps(mock_cbrf_response).encode()
+
+    with stub_http_server(respond) as server:
+        for _ in range(3):
+            client = CBRFClient()
+            client.base_url = server.url
+            async with client:
+                result = await client.get_daily_rates()
+            assert result["Valute"] == 92.5
+
+    assert server.hits == 3
+    assert not_modified == 2
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from app.external import base_client as base_client_module
+from app.external.base_client import BaseAPIClient, HTTPClientRegistry
+from pytest import MonkeyPatch
+
+from ..utils import stub_http_server
+
+
+def _ok(handler):
+    return 200, {"Content-Type": "application/json"}, json.dumps({"ok": True}).encode()
+
+
+@pytest.fixture
+def registry(monkeypatch: MonkeyPatch) -> HTTPClientRegistry:
+    registry = HTTPClientRegistry()
+    monkeypatch.setattr(base_client_module, "http_clients", registry)
+    registry.start()
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_connection(registry: HTTPClientRegistry) -> None:
+    with stub_http_server(_ok) as server:
+        for _ in range(5):
+            client = BaseAPIClient()
+            client.base_url = server.url
+            async with client:
+                assert await client.request("GET", "rates") == {"ok": True}
+
+        stats = registry.stats()[server.url]
+        await registry.aclose()
+
+    assert server.hits == 5
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["open_connections"] == 1
+
+
+@pytest.mark.asyncio
+async def test_borrowed_client_is_not_closed(registry: HTTPClientRegistry) -> None:
+    async with BaseAPIClient() as client:
+        shared = client.client
+
+    assert not shared.is_closed
+    await registry.aclose()
+    assert shared.is_closed
+
+
+@pytest.mark.asyncio
+async def test_stats_survive_missing_transport_internals(
+    registry: HTTPClientRegistry, monkeypatch: MonkeyPatch
+) -> None:
+    client = registry.get_client("http://upstream", timeout=1.0)
+    monkeypatch.setattr(client, "_transport", object())
+
+    stats = registry.stats()["http://upstream"]
+    monkeypatch.undo()
+    await registry.aclose()
+
+    assert stats["open_connections"] == 0
+    assert stats["idle_connections"] == 0
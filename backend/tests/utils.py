@@ -1,6 +1,10 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncGenerator, Callable, Dict, Iterator, List, Optional, Tuple
 
+from app.db.codecs import Codec, JsonCodec
+from app.db.instrumentation import QueryStats, track_queries
 from asgi_lifespan import LifespanManager
 from httpx import ASGITransport, AsyncClient
 
@@ -14,3 +18,193 @@ async def client_manager(app, base_url="http://test", **kw) -> ClientManagerType
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url=base_url, **kw) as c:
             yield c
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler whose responses are produced by ``server.respond``."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.hits += 1
+        status, headers, body = self.server.respond(self)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def stub_http_server(
+    respond: Callable[[BaseHTTPRequestHandler], Tuple[int, Dict[str, str], bytes]],
+) -> Iterator[ThreadingHTTPServer]:
+    """Run a local HTTP server in a thread; ``server.url`` is its base URL.
+
+    ``respond`` maps the incoming request to (status, headers, body) and
+    ``server.hits`` counts the requests received.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.respond = respond
+    server.hits = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeRedis:
+    """In-memory stand-in for RedisRepository; TTLs are ignored."""
+
+    def __init__(self, codec: Optional[Codec] = None) -> None:
+        self.data: Dict[str, Any] = {}
+        self.commands = 0
+        self.codec = codec or JsonCodec()
+
+    async def get(self, key: str) -> Optional[str]:
+        self.commands += 1
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> bool:
+        self.commands += 1
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        self.commands += 1
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        self.commands += 1
+        return self.data.get(key, {}).get(field)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        self.commands += 1
+        return [self.data.get(key) for key in keys]
+
+    def value_key(self, key: str) -> str:
+        return f"{key}:{self.codec.name}"
+
+    async def get_value(self, key: str) -> Any:
+        data = await self.get(key)
+        return self.codec.decode(data) if data is not None else None
+
+    async def set_value(self, key: str, value: Any, expire: int | None = None) -> bool:
+        return await self.set(key, self.codec.encode(value), expire)
+
+    async def hget_value(self, key: str, field: str) -> Any:
+        data = await self.hget(key, field)
+        return self.codec.decode(data) if data is not None else None
+
+    async def set_value_if(
+        self,
+        key: str,
+        value: Any,
+        guard_key: str,
+        guard: Optional[str],
+        expire: int | None = None,
+    ) -> bool:
+        self.commands += 1
+        if self.data.get(guard_key) != guard:
+            return False
+        self.data[key] = self.codec.encode(value)
+        return True
+
+    async def hset_value_if(
+        self,
+        key: str,
+        field: str,
+        value: Any,
+        guard_key: str,
+        guard: Optional[str],
+        expire: int | None = None,
+    ) -> bool:
+        self.commands += 1
+        if self.data.get(guard_key) != guard:
+            return False
+        self.data.setdefault(key, {})[field] = self.codec.encode(value)
+        return True
+
+    def pipeline(self, transaction: bool = False) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.queued: List[Tuple[str, tuple]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def hset(self, key: str, field: str, value: str) -> None:
+        self.queued.append(("hset", (key, field, value)))
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.queued.append(("set", (key, value)))
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.queued.append(("expire", (key,)))
+
+    def delete(self, *keys: str) -> None:
+        self.queued.append(("delete", keys))
+
+    def incr(self, key: str) -> None:
+        self.queued.append(("incr", (key,)))
+
+    async def execute(self) -> List[Any]:
+        self.redis.commands += 1
+        results = []
+        for command, args in self.queued:
+            if command == "hset":
+                key, field, value = args
+                self.redis.data.setdefault(key, {})[field] = value
+            elif command == "set":
+                key, value = args
+                self.redis.data[key] = value
+            elif command == "delete":
+                results.append(
+                    sum(self.redis.data.pop(key, None) is not None for key in args)
+                )
+                continue
+            elif command == "incr":
+                (key,) = args
+                value = int(self.redis.data.get(key, 0)) + 1
+                self.redis.data[key] = str(value)
+                results.append(value)
+                continue
+            results.append(True)
+        self.queued = []
+        return results
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Iterator[QueryStats]:
+    """Fail if the block runs more than ``budget`` SQL statements.
+
+    The engine must be instrumented with ``instrument_engine``; the test
+    database fixtures do that. On failure the statements are listed, which
+    makes N+1 patterns easy to spot.
+
+    Usage:
+        with assert_max_queries(2):
+            await service.get_package_by_id(package_id, session_id)
+    """
+    with track_queries(record_statements=True) as stats:
+        yield stats
+    assert (
+        stats.count <= budget
+    ), f"{stats.count} queries exceeded the budget of {budget}:\n" + "\n".join(
+        f"  {statement}" for statement in stats.statements
+    )